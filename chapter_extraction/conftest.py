@@ -0,0 +1,5 @@
+# main.py and the modules it uses import each other as top-level modules, make that work under pytest too
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
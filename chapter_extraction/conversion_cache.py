@@ -0,0 +1,90 @@
+# Content-addressed cache of office to html conversions
+import hashlib
+import os
+import shutil
+import tempfile
+
+CHUNK_SIZE = 1 << 20
+
+
+class ConversionCache:
+    """
+    Converted html keyed by the hash of the input bytes and the converter version,
+    evicting the least recently used entries once the cache grows past max_bytes
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(file_path, version):
+        digest = hashlib.sha256(version.encode("utf-8"))
+        with open(file_path, "rb") as temp:
+            for chunk in iter(lambda: temp.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".html")
+
+    def get(self, key, out_file):
+        """copy the cached html to out_file, return False on a miss"""
+        try:
+            shutil.copyfile(self.path(key), out_file)
+            # 用修改时间记录最近一次使用，淘汰时按它排序
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, html_file):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(html_file, tmp)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".html"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        return self.hits, self.misses
+
+
+_cache = None
+
+
+def configure_cache(cache_dir=None, max_bytes=2 << 30):
+    global _cache
+    _cache = None if cache_dir is None else ConversionCache(cache_dir, max_bytes)
+    return _cache
+
+
+def get_conversion_cache():
+    return _cache
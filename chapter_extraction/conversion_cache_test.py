@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from .conversion_cache import ConversionCache
+
+
+class TestConversionCache(unittest.TestCase):
+
+    def test_hit_miss_and_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ConversionCache(os.path.join(tmp, "cache"), max_bytes=250)
+            html = os.path.join(tmp, "a.html")
+            out = os.path.join(tmp, "out.html")
+            keys = []
+            for i in range(3):
+                src = os.path.join(tmp, str(i) + ".docx")
+                with open(src, "w") as temp:
+                    temp.write("doc " + str(i))
+                with open(html, "w") as temp:
+                    temp.write("<p>" + "x" * 100 + "</p>")
+                keys.append(cache.key(src, "v1"))
+                self.assertFalse(cache.get(keys[-1], out))
+                cache.put(keys[-1], html)
+                # 显式设置修改时间，不依赖文件系统的时间精度
+                os.utime(cache.path(keys[-1]), (100 * (i + 1), 100 * (i + 1)))
+                if i == 1:
+                    self.assertTrue(cache.get(keys[0], out))
+                    os.utime(cache.path(keys[0]), (250, 250))
+            self.assertNotEqual(cache.key(src, "v1"), cache.key(src, "v2"))
+            # keys[1] is the least recently used entry once keys[0] has been read again
+            self.assertTrue(cache.get(keys[0], out))
+            self.assertFalse(cache.get(keys[1], out))
+            self.assertTrue(cache.get(keys[2], out))
+            self.assertEqual((3, 4), cache.stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
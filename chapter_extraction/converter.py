@@ -0,0 +1,239 @@
+# Office file to html conversion through long-lived unoconv listeners
+import itertools
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import util
+
+STARTUP_TIMEOUT = 60
+
+FAKE_LISTENER = """import subprocess, sys
+# 和 unoconv --listener 一样，office 是子进程，包装进程只是等它退出
+sys.exit(subprocess.call([sys.executable, "-c", sys.argv[1]] + sys.argv[2:]))
+"""
+
+FAKE_OFFICE = """import os, socket, sys, time
+port, startup, profile = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3]
+# 和 soffice 一样，一个用户目录只能有一个实例，后来的把参数交给先来的就退出
+lock = os.path.join(profile, ".lock")
+try:
+    with open(lock) as temp:
+        os.kill(int(temp.read()), 0)
+    sys.exit(0)
+except (OSError, ValueError):
+    pass
+with open(lock, "w") as temp:
+    temp.write(str(os.getpid()))
+time.sleep(startup)
+server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+server.bind(("127.0.0.1", port))
+server.listen(16)
+while True:
+    server.accept()[0].close()
+"""
+
+FAKE_CONVERT = """import html, socket, sys, time
+port, src, dst, delay = int(sys.argv[1]), sys.argv[2], sys.argv[3], float(sys.argv[4])
+# 和 unoconv 一样，连不上监听进程就算失败（unoconv 会自己另起一个 office）
+try:
+    socket.create_connection(("127.0.0.1", port), 1).close()
+except OSError:
+    sys.exit("no listener on port " + str(port))
+time.sleep(delay)
+with open(src, "rb") as temp:
+    lines = temp.read().decode("utf-8", "replace").splitlines()
+with open(dst, "w") as temp:
+    temp.write("<html><body>" + "".join("<p>" + html.escape(line) + "</p>" for line in lines) + "</body></html>")
+"""
+
+
+class UnoconvBackend:
+
+    def __init__(self):
+        self._version = None
+
+    def version(self):
+        if self._version is None:
+            try:
+                result = subprocess.run(["unoconv", "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+                self._version = result.stdout.decode("utf-8", "replace").strip()
+            except OSError:
+                self._version = "unoconv"
+        return self._version
+
+    def listener_command(self, port, profile):
+        return ["unoconv", "--listener", "--port", str(port), "--user-profile=" + profile]
+
+    def convert_command(self, port, profile, src, dst):
+        return ["unoconv", "--port", str(port), "--user-profile=" + profile, "-f", "html", "-o", dst, src]
+
+
+class FakeBackend:
+    """
+    Stands in for unoconv without an office suite: the listener starts an office child that, like
+    soffice, exits at once when another instance holds its profile, else accepts connections on its
+    port after startup seconds, and a conversion, which fails when nothing listens on the port yet,
+    writes every line of the input as a <p> after waiting delay seconds
+    """
+
+    def __init__(self, delay=0.0, startup=0.0):
+        self.delay = delay
+        self.startup = startup
+
+    def version(self):
+        return "fake"
+
+    def listener_command(self, port, profile):
+        return [sys.executable, "-c", FAKE_LISTENER, FAKE_OFFICE, str(port), str(self.startup), profile]
+
+    def convert_command(self, port, profile, src, dst):
+        return [sys.executable, "-c", FAKE_CONVERT, str(port), src, dst, str(self.delay)]
+
+
+def _kill_group(pid, sig):
+    try:
+        os.killpg(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Converter:
+    """
+    One listener process, converting one file at a time through its port. Office allows one instance
+    per user profile, so every start gets a profile directory of its own, and the listener runs in its
+    own process group so that stop() also reaches the office process unoconv started
+    """
+
+    def __init__(self, backend, startup_timeout=STARTUP_TIMEOUT):
+        self.backend = backend
+        self.startup_timeout = startup_timeout
+        self.port = None
+        self.profile = None
+        self.process = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.port = _free_port()
+        self.profile = tempfile.mkdtemp(prefix="unoconv-profile-")
+        self.process = subprocess.Popen(self.backend.listener_command(self.port, self.profile),
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                        start_new_session=True)
+        self.wait_ready()
+
+    def wait_ready(self):
+        """
+        Block until the listener accepts connections: a client started before that finds no listener
+        and unoconv then starts an office instance of its own
+        """
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), 1).close()
+                return
+            except OSError:
+                pass
+            if self.process.poll() is not None:
+                code = self.process.returncode
+                self.stop()
+                raise RuntimeError("Listener on port " + str(self.port) + " exited with " + str(code))
+            if time.monotonic() > deadline:
+                self.stop()
+                raise TimeoutError("Listener on port " + str(self.port) + " not ready after " +
+                                   str(self.startup_timeout) + "s")
+            time.sleep(0.1)
+
+    def stop(self):
+        if self.process is not None:
+            _kill_group(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(5)
+            except subprocess.TimeoutExpired:
+                pass
+            # 包装进程退出后 office 子进程可能还在，整组强制结束
+            _kill_group(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+            self.process = None
+        if self.profile is not None:
+            shutil.rmtree(self.profile, ignore_errors=True)
+            self.profile = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def convert(self, src, dst, timeout=None):
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self.restart()
+            try:
+                result = subprocess.run(self.backend.convert_command(self.port, self.profile, src, dst),
+                                        timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            except subprocess.TimeoutExpired:
+                # 转换卡住时，监听进程多半也已经挂起，重启后再交给调用方处理；
+                # 重启失败就等下一个文件再启动，报给调用方的仍是超时
+                try:
+                    self.restart()
+                except (RuntimeError, TimeoutError) as e:
+                    print("[INFO] restart of the listener failed: " + str(e))
+                raise TimeoutError("Conversion of " + src + " timed out after " + str(timeout) + "s")
+            if result.returncode != 0:
+                raise RuntimeError("Conversion of " + src + " failed: " + result.stderr.decode("utf-8", "replace"))
+
+
+class ConversionService:
+    """
+    A fixed set of converters, handed files round-robin, each listener starts on its first file
+    """
+
+    def __init__(self, workers=1, timeout=None, backend=None):
+        if backend is None:
+            backend = UnoconvBackend()
+        self.backend = backend
+        self.timeout = timeout
+        self.converters = [Converter(backend) for _ in range(workers)]
+        self._next = itertools.cycle(self.converters)
+        self._lock = threading.Lock()
+
+    def convert(self, src, dst, timeout=None):
+        with self._lock:
+            converter = next(self._next)
+        converter.convert(src, dst, self.timeout if timeout is None else timeout)
+
+    def version(self):
+        return self.backend.version()
+
+    def close(self):
+        for converter in self.converters:
+            converter.stop()
+
+
+_service = None
+
+
+def configure_conversion(workers=1, timeout=None, backend=None):
+    global _service
+    if _service is not None:
+        _service.close()
+    _service = ConversionService(workers, timeout, backend)
+    # 进程池的子进程退出时不会执行 atexit，multiprocessing 的 finalizer 两边都会执行
+    util.Finalize(_service, _service.close, exitpriority=10)
+    return _service
+
+
+def get_conversion_service():
+    if _service is None:
+        configure_conversion()
+    return _service
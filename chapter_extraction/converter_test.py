@@ -0,0 +1,94 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+from .converter import ConversionService, Converter, FakeBackend
+
+
+class TestConversionService(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.dir.name, "a.docx")
+        with open(self.src, "w") as temp:
+            temp.write("第一节 总则\n第二节 释义\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_robin(self):
+        service = ConversionService(workers=2, backend=FakeBackend())
+        try:
+            for i in range(4):
+                service.convert(self.src, os.path.join(self.dir.name, str(i) + ".html"))
+            ports = [converter.port for converter in service.converters]
+            self.assertEqual(2, len(set(ports)))
+            with open(os.path.join(self.dir.name, "3.html")) as temp:
+                self.assertIn("<p>第二节 释义</p>", temp.read())
+        finally:
+            service.close()
+
+    def test_timeout_restarts_converter(self):
+        service = ConversionService(workers=1, timeout=0.5, backend=FakeBackend(delay=5))
+        try:
+            with self.assertRaises(TimeoutError):
+                service.convert(self.src, os.path.join(self.dir.name, "a.html"))
+            converter = service.converters[0]
+            self.assertIsNotNone(converter.process)
+            self.assertIsNone(converter.process.poll())
+            service.converters[0].backend.delay = 0
+            service.convert(self.src, os.path.join(self.dir.name, "a.html"))
+            self.assertTrue(os.path.exists(os.path.join(self.dir.name, "a.html")))
+        finally:
+            service.close()
+
+    def test_separate_profiles(self):
+        # 同一个用户目录上的第二个 office 会直接退出，每个转换器要有自己的目录
+        service = ConversionService(workers=2, backend=FakeBackend())
+        try:
+            for i in range(2):
+                service.convert(self.src, os.path.join(self.dir.name, str(i) + ".html"))
+            profiles = [converter.profile for converter in service.converters]
+            self.assertEqual(2, len(set(profiles)))
+            for converter in service.converters:
+                self.assertIsNone(converter.process.poll())
+        finally:
+            service.close()
+        for profile in profiles:
+            self.assertFalse(os.path.exists(profile))
+
+    def test_stop_kills_office(self):
+        converter = Converter(FakeBackend())
+        converter.convert(self.src, os.path.join(self.dir.name, "a.html"))
+        port = converter.port
+        converter.stop()
+        # office 是监听进程的子进程，停掉后端口上不应再有人监听（信号送达需要一点时间）
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+            except OSError:
+                return
+            time.sleep(0.1)
+        self.fail("office process still listening on port " + str(port))
+
+    def test_waits_for_listener(self):
+        # 监听进程 1 秒后才开始监听，第一次转换不能抢在它前面
+        service = ConversionService(workers=1, backend=FakeBackend(startup=1.0))
+        try:
+            service.convert(self.src, os.path.join(self.dir.name, "a.html"))
+            self.assertTrue(os.path.exists(os.path.join(self.dir.name, "a.html")))
+        finally:
+            service.close()
+
+    def test_listener_startup_timeout(self):
+        converter = Converter(FakeBackend(startup=5), startup_timeout=0.5)
+        with self.assertRaises(TimeoutError):
+            converter.convert(self.src, os.path.join(self.dir.name, "a.html"))
+        self.assertIsNone(converter.process)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# Native .docx reading, streams word/document.xml out of the zip without an office suite
+import zipfile
+
+from lxml import etree
+
+from stream_parser import StreamElement, StreamDocument
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+# word 元素到 html 元素，第二项表示是否进入段落序列
+BLOCKS = {W + "tbl": ("table", True), W + "tr": ("tr", False), W + "tc": ("td", False), W + "p": ("p", True)}
+IMAGES = [W + "drawing", W + "pict"]
+BREAKS = {W + "tab": "\t", W + "br": "\n", W + "cr": "\n"}
+
+
+def _append_text(element, text):
+    if len(element):
+        element[-1].tail = (element[-1].tail or "") + text
+    else:
+        element.text = (element.text or "") + text
+
+
+def docx_paragraphs(docx_path):
+    """
+    To build the img/table/p element stream of a .docx the way its html conversion nests them:
+    a <table> is followed by the <p> of its cells, an <img> follows the <p> holding it
+    :param docx_path: str, docx file path
+    :return: tuple, (list of StreamElement in document order, StreamDocument)
+    """
+    elements = []
+    outermost = []
+    stack = []
+    fallback_depth = 0
+
+    def keep(element):
+        elements.append(StreamElement(element))
+        if element.getparent() is None:
+            outermost.append(elements[-1])
+
+    with zipfile.ZipFile(docx_path) as archive, archive.open("word/document.xml") as xml:
+        for event, node in etree.iterparse(xml, events=("start", "end")):
+            tag = node.tag
+            # mc:Fallback repeats the content of mc:Choice for old readers
+            if tag == MC + "Fallback":
+                fallback_depth += 1 if event == "start" else -1
+                continue
+            if fallback_depth > 0:
+                continue
+
+            if event == "start":
+                if tag in BLOCKS:
+                    name, kept = BLOCKS[tag]
+                    element = etree.Element(name) if not stack else etree.SubElement(stack[-1], name)
+                    if kept:
+                        keep(element)
+                    stack.append(element)
+                elif tag in IMAGES:
+                    keep(etree.Element("img") if not stack else etree.SubElement(stack[-1], "img"))
+                continue
+
+            if tag == W + "t" and stack:
+                _append_text(stack[-1], node.text or "")
+            elif tag in BREAKS and stack and node.getparent().tag == W + "r":
+                # w:pPr/w:tabs/w:tab 是制表位定义，不是文本
+                _append_text(stack[-1], BREAKS[tag])
+            elif tag in BLOCKS:
+                stack.pop()
+                if not stack:
+                    # 顶层段落或表格已经转换完，释放对应的 xml
+                    node.clear()
+                    while node.getprevious() is not None:
+                        del node.getparent()[0]
+    return elements, StreamDocument(outermost)
@@ -0,0 +1,46 @@
+import io
+import unittest
+import zipfile
+
+from .docx_reader import docx_paragraphs
+
+DOCUMENT = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+            xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">
+<w:body>
+<w:p><w:pPr><w:tabs><w:tab w:val="right" w:leader="dot" w:pos="8300"/></w:tabs></w:pPr>
+  <w:r><w:t>第一节 总则</w:t></w:r><w:r><w:tab/><w:t>1</w:t></w:r></w:p>
+<w:tbl><w:tr>
+  <w:tc><w:p><w:r><w:t>表格</w:t></w:r></w:p></w:tc>
+  <w:tc><w:p><w:r><w:t>第一行</w:t><w:br/><w:t>第二行</w:t></w:r></w:p></w:tc>
+</w:tr></w:tbl>
+<w:p><w:r><w:t>图片</w:t></w:r><w:r><mc:AlternateContent>
+  <mc:Choice Requires="wps"><w:drawing/></mc:Choice>
+  <mc:Fallback><w:pict/><w:t>旧版</w:t></mc:Fallback>
+</mc:AlternateContent></w:r></w:p>
+</w:body></w:document>
+"""
+
+
+def docx_bytes(document):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    data.seek(0)
+    return data
+
+
+class TestDocxReader(unittest.TestCase):
+
+    def test_docx_paragraphs(self):
+        elements, document = docx_paragraphs(docx_bytes(DOCUMENT))
+        self.assertEqual([p.name for p in elements], ["p", "table", "p", "p", "p", "img"])
+        self.assertEqual(elements[0].get_text(), "第一节 总则\t1")
+        self.assertEqual(elements[1].get_text(), "表格第一行\n第二行")
+        self.assertEqual(elements[4].get_text(), "图片")
+        self.assertEqual(len(document.elements), 3)
+        self.assertIn("<td><p>表格</p></td>", str(document))
+
+
+if __name__ == "__main__":
+    unittest.main()
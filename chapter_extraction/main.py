@@ -3,12 +3,21 @@
 
 import argparse
 import os
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-from utils import filesToSoup, get_soup_dictionary, match_soup, get_part_soup, get_chapters_html
+import numpy as np
 
+from conversion_cache import configure_cache, get_conversion_cache
+from converter import configure_conversion
+from utils import check_pdf_detection, configure_pdf_detection, filesToIndex, get_soup_dictionary, match_soup, get_part_soup, get_chapters_html, \
+    write_chapters
 
-def convert(file, out_path, language="Chinese", chapter_num=24, chapters=None, combine=True):
+
+def convert(file, out_path, language="Chinese", chapter_num=24, chapters=None, combine=True, parser="bs4",
+            engine="unoconv"):
     """
     To convert file into chapters using menu
     :param file: str, original file path
@@ -16,41 +25,116 @@ def convert(file, out_path, language="Chinese", chapter_num=24, chapters=None, c
     :param chapter_num: int, number of chapters to extract
     :param chapters: json, chapter information, optional
     :param combine: boolen, combine target chapters into one html, optional
+    :param parser: str, html parser engine, bs4, lxml or stream, optional
+    :param engine: str, pdf/docx reading engine, unoconv or native, optional
     :return:
     """
     filename = os.path.basename(file)
-    soup = filesToSoup(file, out_path)
+    para = filesToIndex(file, out_path, language, parser, engine)
 
     # get dictionary from soup
-    file_dictionary, para_id = get_soup_dictionary(soup, chapter_num, language)
+    file_dictionary, para_id = get_soup_dictionary(para, chapter_num)
     # print(file_dictionary)
 
-    dic, li = match_soup(para_id, file_dictionary, soup, language)
+    dic, li = match_soup(para_id, file_dictionary, para)
 
-    get_part_soup(soup, dic, li)
+    get_part_soup(para, dic, li)
 
     if chapters is not None:
-        get_chapters_html(soup, dic, chapters, combine, out_path, language)
+        get_chapters_html(para, dic, chapters, combine, out_path)
 
     if not combine:
         with open(os.path.join(out_path, (filename + ".html")), "w") as temp:
-            temp.write(str(soup))
+            temp.write(str(para.document))
             temp.close()
     else:
-        for chapter in dic:
-            para = [p for p in soup.find_all() if p.name in ['table', 'p']]
-            out_file = os.path.join(out_path, (filename + "_" + chapter + ".html"))
-            with open(out_file, "w") as temp:
-                target = [p for p in para if p["chapter"] == chapter]
-                for p in target:
-                    lines = [line for line in p.find_all() if line.name in ['line']]
-                    for line in lines:
-                        del line['style']
-
-                    del p['style']
-                target = [str(p) for p in target]
-                temp.write(''.join(target))
-                temp.close()
+        write_chapters(para, dic, out_path, filename)
+
+
+def convert_file(file, out_path, language="Chinese", chapter_num=24, chapters=None, combine=True, parser="bs4",
+                 engine="unoconv"):
+    """
+    To run convert on one file, keeping its failure away from the rest of the batch
+    :param file: str, original file path
+    :return: tuple, (file, seconds spent, formatted traceback or None, (cache hits, cache misses))
+    """
+    cache = get_conversion_cache()
+    hits, misses = (0, 0) if cache is None else cache.stats()
+    start = time.time()
+    error = None
+    try:
+        convert(file, out_path, language, chapter_num, chapters, combine, parser, engine)
+    except Exception:
+        error = traceback.format_exc()
+    seconds = time.time() - start
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return file, seconds, error, (hits, misses)
+
+
+def setup_worker(converters=1, timeout=None, cache_dir=None, cache_size=2 << 30, pdf_sample=None,
+                 pdf_confidence=0.95):
+    configure_conversion(converters, timeout)
+    configure_cache(cache_dir, cache_size)
+    configure_pdf_detection(pdf_sample, pdf_confidence)
+
+
+def convert_files(files, out_path, language="Chinese", chapter_num=24, chapters=None, combine=True, parser="bs4",
+                  engine="unoconv", workers=1, converters=1, timeout=None, cache_dir=None, cache_size=2 << 30,
+                  pdf_sample=None, pdf_confidence=0.95):
+    """
+    To convert a batch of files, in a process pool when workers > 1
+    :param files: list, original file paths
+    :param workers: int, number of worker processes
+    :param converters: int, number of unoconv listeners per process, a worker is single-threaded so
+                       more than 1 only spreads its files over listeners, it never converts two at once
+    :param timeout: float, seconds allowed for one office conversion
+    :param cache_dir: str, conversion cache dir, no cache when None
+    :param cache_size: int, conversion cache size limit in bytes
+    :param pdf_sample: int, pages sampled to detect image pdfs, all pages when None
+    :param pdf_confidence: float, confidence at which pdf sampling stops early
+    :return: list, convert_file results in the same order as files
+    """
+    args = [repeat(out_path), repeat(language), repeat(chapter_num), repeat(chapters), repeat(combine), repeat(parser),
+            repeat(engine)]
+    # 在进程池启动前建好输出目录，native 引擎不会经过 filesToHtml
+    os.makedirs(out_path, exist_ok=True)
+    results = []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_worker,
+                                 initargs=(converters, timeout, cache_dir, cache_size, pdf_sample,
+                                           pdf_confidence)) as pool:
+            for result in pool.map(convert_file, files, *args):
+                print_result(result)
+                results.append(result)
+    else:
+        setup_worker(converters, timeout, cache_dir, cache_size, pdf_sample, pdf_confidence)
+        for result in map(convert_file, files, *args):
+            print_result(result)
+            results.append(result)
+    return results
+
+
+def print_result(result):
+    file, seconds, error, _ = result
+    if error is None:
+        print("[INFO] Finish ", os.path.basename(file))
+    else:
+        print("[ERROR]", os.path.basename(file), error.strip().splitlines()[-1])
+        print(error)
+
+
+def print_summary(results, elapsed):
+    latency = np.array([seconds for _, seconds, _, _ in results])
+    failed = sum(1 for _, _, error, _ in results if error is not None)
+    print("[INFO] Converted %d files (%d failed) in %.2fs" % (len(results), failed, elapsed))
+    if len(results) > 0:
+        print("[INFO] Throughput %.2f files/s, latency p50 %.3fs, p95 %.3fs" % (
+            len(results) / max(elapsed, 1e-9), np.percentile(latency, 50), np.percentile(latency, 95)))
+    hits = sum(cache[0] for _, _, _, cache in results)
+    misses = sum(cache[1] for _, _, _, cache in results)
+    if hits + misses > 0:
+        print("[INFO] Conversion cache %d hits, %d misses" % (hits, misses))
 
 
 if __name__ == "__main__":
@@ -62,6 +146,22 @@ if __name__ == "__main__":
     parser.add_argument("--chapters", type=str, help="chapter information", required=False, default=None)
     parser.add_argument("--combine", type=bool, help="combine target chapters into one html", required=False,
                         default=True)
+    parser.add_argument("--parser", type=str, help="html parser engine, lxml and stream nest malformed html the "
+                        "same way", required=False, default="bs4", choices=["bs4", "lxml", "stream"])
+    parser.add_argument("--engine", type=str, help="pdf/docx reading engine", required=False, default="unoconv",
+                        choices=["unoconv", "native"])
+    parser.add_argument("--workers", type=int, help="number of worker processes", required=False, default=1)
+    parser.add_argument("--converters", type=int, help="number of unoconv listeners per worker, each worker "
+                        "converts one file at a time so values above 1 give no extra concurrency, use --workers",
+                        required=False, default=1)
+    parser.add_argument("--timeout", type=float, help="seconds allowed for one office conversion", required=False,
+                        default=None)
+    parser.add_argument("--cache_dir", type=str, help="conversion cache dir", required=False, default=None)
+    parser.add_argument("--cache_size", type=int, help="conversion cache size in MB", required=False, default=2048)
+    parser.add_argument("--pdf_sample", type=int, help="pages sampled to detect image pdfs", required=False,
+                        default=None)
+    parser.add_argument("--pdf_confidence", type=float, help="confidence to stop pdf sampling early", required=False,
+                        default=0.95)
     args = parser.parse_args()
 
     file_dir = args.fileDir
@@ -70,13 +170,22 @@ if __name__ == "__main__":
     chapters = args.chapters
     combine = args.combine
     language = args.language
+    workers = args.workers
+    html_parser = args.parser
+    engine = args.engine
+    converters = args.converters
+    timeout = args.timeout
+    cache_dir = args.cache_dir
+    cache_size = args.cache_size << 20
+    pdf_sample = args.pdf_sample
+    pdf_confidence = args.pdf_confidence
+    try:
+        check_pdf_detection(pdf_sample, pdf_confidence)
+    except ValueError as e:
+        parser.error(str(e))
 
-    files = os.listdir(file_dir)
-    for file in files:
-        filepath = os.path.join(file_dir, file)
-        try:
-            convert(filepath, out_path, language, chapter_num, chapters, combine)
-            print("[INFO] Finish ", file)
-        except Exception as e:
-            print("[ERROR]", file, e)
-            print(traceback.print_exc())
+    files = [os.path.join(file_dir, file) for file in sorted(os.listdir(file_dir))]
+    start = time.time()
+    results = convert_files(files, out_path, language, chapter_num, chapters, combine, html_parser, engine,
+                            workers, converters, timeout, cache_dir, cache_size, pdf_sample, pdf_confidence)
+    print_summary(results, time.time() - start)
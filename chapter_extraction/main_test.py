@@ -0,0 +1,74 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from .main import convert_files, print_summary
+
+CONTRACT = """<html><head><meta charset="utf-8"></head><body>
+<p>封面 资产管理合同 {0}</p><p>目录</p>
+<p>第一节 总则 ........ 3</p><p>第二节 释义 ........ 4</p><p>第三节 资产管理计划财产的估值 ........ 5</p>
+<p></p><p>正文</p>
+<p>第一节 总则</p><p>本节说明总则 {0}。</p>
+<p>第二节 释义</p><p>释义内容 {0}</p>
+<p>第三节 资产管理计划财产的估值</p><p>估值内容 {0}</p>
+</body></html>
+"""
+
+
+class TestConvertFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.files = []
+        for name in ["a.html", "bad.txt", "b.html", "c.html"]:
+            path = os.path.join(self.dir.name, name)
+            with open(path, "w") as temp:
+                temp.write(CONTRACT.format(name))
+            self.files.append(path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def run_batch(self, workers):
+        out_path = os.path.join(self.dir.name, "out" + str(workers))
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = convert_files(self.files, out_path, "Chinese", 3, workers=workers)
+        outputs = {}
+        for file in sorted(os.listdir(out_path)):
+            with open(os.path.join(out_path, file)) as temp:
+                outputs[file] = temp.read()
+        return results, outputs
+
+    def test_workers_same_results(self):
+        results, outputs = self.run_batch(1)
+        parallel_results, parallel_outputs = self.run_batch(2)
+        # 结果按输入顺序返回，坏文件只影响它自己
+        self.assertEqual([file for file, _, _, _ in results], self.files)
+        self.assertEqual([file for file, _, _, _ in parallel_results], self.files)
+        for result in [results, parallel_results]:
+            errors = [error for _, _, error, _ in result]
+            self.assertEqual([error is None for error in errors], [True, False, True, True])
+            self.assertIn("ValueError", errors[1])
+        self.assertEqual(outputs, parallel_outputs)
+        self.assertEqual(len(outputs), 9)
+        self.assertIn("本节说明总则 b.html", outputs["b.html_总则.html"])
+
+    def test_print_summary(self):
+        results = [("a.html", 1.0, None, (1, 0)), ("bad.txt", 3.0, "Traceback\nValueError: x\n", (0, 1))]
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            print_summary(results, 2.0)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "[INFO] Converted 2 files (1 failed) in 2.00s")
+        self.assertEqual(lines[1], "[INFO] Throughput 1.00 files/s, latency p50 2.000s, p95 2.900s")
+        self.assertEqual(lines[2], "[INFO] Conversion cache 1 hits, 1 misses")
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            print_summary([], 0.0)
+        self.assertEqual(out.getvalue(), "[INFO] Converted 0 files (0 failed) in 0.00s\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
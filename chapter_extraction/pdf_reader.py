@@ -0,0 +1,39 @@
+# Native text pdf reading with PyMuPDF, no office suite involved
+import re
+
+import fitz
+from lxml import etree
+
+from stream_parser import StreamElement, StreamDocument
+
+# lxml 拒绝 XML 1.0 不允许的字符，乱码字形的 pdf 里常见 \x02、\x0c 这类控制字符
+_XML_INVALID = re.compile("[^\t\n\r\u0020-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def pdf_paragraphs(pdf_path, page_dicts=None):
+    """
+    To build the img/p element stream of a text pdf straight from PyMuPDF text dictionaries,
+    one <p> per text line, since a menu is often a single block, and one <img> per image block
+    :param pdf_path: str, pdf file path
+    :param page_dicts: dict, page index to page.getText("dict") already loaded by detect_pdf_type, optional,
+                       each entry is removed once its page is read so its image bytes can be freed
+    :return: tuple, (list of StreamElement in reading order, StreamDocument)
+    """
+    if page_dicts is None:
+        page_dicts = {}
+    elements = []
+    doc = fitz.open(pdf_path)
+    for idx, page in enumerate(doc):
+        page_dict = page_dicts.pop(idx, None)
+        if page_dict is None:
+            page_dict = page.getText("dict")
+        for block in page_dict['blocks']:
+            if block["type"] == 1:
+                elements.append(StreamElement(etree.Element("img")))
+                continue
+            for line in block.get('lines', []):
+                p = etree.Element("p")
+                p.text = _XML_INVALID.sub("", "".join(span['text'] for span in line['spans']))
+                elements.append(StreamElement(p))
+    doc.close()
+    return elements, StreamDocument(elements)
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from .pdf_reader import pdf_paragraphs
+
+# 一页空白 pdf，文本由 page_dicts 提供
+BLANK_PDF = (b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+             b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+             b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+             b"trailer<</Root 1 0 R>>\n%%EOF\n")
+
+
+class TestPdfReader(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "a.pdf")
+        with open(self.path, "wb") as temp:
+            temp.write(BLANK_PDF)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_pdf_paragraphs(self):
+        page_dicts = {0: {"blocks": [
+            {"type": 0, "lines": [{"spans": [{"text": "第一节\x0c总则"}, {"text": "\x02 ...... 1"}]},
+                                  {"spans": [{"text": "第二节 释义"}]}]},
+            {"type": 1, "image": b"\x00" * 16},
+        ]}}
+        elements, document = pdf_paragraphs(self.path, page_dicts)
+        self.assertEqual([p.name for p in elements], ["p", "p", "img"])
+        self.assertEqual([p.get_text() for p in elements], ["第一节总则 ...... 1", "第二节 释义", ""])
+        self.assertIn("<p>第一节总则 ...... 1</p>", str(document))
+        # 读过的页面字典已经释放
+        self.assertEqual(page_dicts, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
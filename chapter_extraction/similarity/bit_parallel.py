@@ -0,0 +1,97 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+# Bit-vector kernels, Python ints serve as bit vectors of any length, one bit per pattern character
+
+
+def match_masks(pattern):
+    """
+    For every character of pattern, the bit vector of the positions it occurs at
+    :param pattern: str
+    :return: dict, character -> int
+    """
+    masks = dict()
+    bit = 1
+    for c in pattern:
+        masks[c] = masks.get(c, 0) | bit
+        bit <<= 1
+    return masks
+
+
+def levenshtein_distance(pattern, text, masks=None):
+    """
+    Levenshtein distance between pattern and text, Myers' algorithm in Hyyro's formulation:
+    the vertical deltas of a whole DP column live in two bit vectors, so each character of text
+    costs a handful of operations on len(pattern) bit integers
+    :param pattern: str, the shorter string gives the smaller integers
+    :param text: str
+    :param masks: dict, match_masks(pattern) when it is reused across calls
+    :return: int
+    """
+    m = len(pattern)
+    if m == 0:
+        return len(text)
+    if masks is None:
+        masks = match_masks(pattern)
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv = full, 0
+    score = m
+    for c in text:
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        # 第 0 行 D[0][j] = j，每列都加 1
+        ph = (ph << 1) | 1
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def lcs_length(pattern, text, masks=None):
+    """
+    Length of the longest common subsequence of pattern and text, Allison-Dix as simplified by Hyyro:
+    the zero bits of V mark the DP column steps, V starts all ones and each character of text
+    updates it with one addition
+    :param pattern: str, the shorter string gives the smaller integers
+    :param text: str
+    :param masks: dict, match_masks(pattern) when it is reused across calls
+    :return: int
+    """
+    m = len(pattern)
+    if m == 0 or len(text) == 0:
+        return 0
+    if masks is None:
+        masks = match_masks(pattern)
+    full = (1 << m) - 1
+    v = full
+    for c in text:
+        u = v & masks.get(c, 0)
+        v = ((v + u) | (v - u)) & full
+    return m - bin(v).count("1")
+
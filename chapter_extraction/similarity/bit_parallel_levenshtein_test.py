@@ -0,0 +1,63 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import random
+import unittest
+
+from .bit_parallel_levenshtein import BitParallelLevenshtein
+from .levenshtein import Levenshtein
+from .similarity import Algorithm, Factory
+
+
+class TestBitParallelLevenshtein(unittest.TestCase):
+
+    def test_bit_parallel_levenshtein(self):
+        a = BitParallelLevenshtein()
+        s0 = ""
+        s1 = ""
+        s2 = "上海"
+        s3 = "上海市"
+        distance_format = "distance: {:.4}\t between {} and {}"
+        print(distance_format.format(str(a.distance(s0, s1)), s0, s1))
+        print(distance_format.format(str(a.distance(s0, s2)), s0, s2))
+        print(distance_format.format(str(a.distance(s0, s3)), s0, s3))
+        print(distance_format.format(str(a.distance(s1, s2)), s1, s2))
+        print(distance_format.format(str(a.distance(s1, s3)), s1, s3))
+        print(distance_format.format(str(a.distance(s2, s3)), s2, s3))
+
+    def test_same_as_levenshtein(self):
+        a = BitParallelLevenshtein()
+        b = Levenshtein()
+        random.seed(0)
+        for _ in range(200):
+            # 长度跨过 64 位，覆盖多个机器字的情况
+            s0 = "".join(random.choice("资产管理计划") for _ in range(random.randint(0, 150)))
+            s1 = "".join(random.choice("资产管理估值") for _ in range(random.randint(0, 150)))
+            self.assertEqual(a.distance(s0, s1), b.distance(s0, s1))
+
+    def test_factory(self):
+        a = Factory.get_algorithm(Algorithm.BIT_PARALLEL_LEVENSHTEIN)
+        self.assertIsInstance(a, BitParallelLevenshtein)
+        self.assertEqual(a.distance("资产管理计划财产的估值", "资产管理计划财产的投资"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
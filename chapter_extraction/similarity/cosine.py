@@ -20,7 +20,9 @@
 
 import math
 
-from .shingle_based import ShingleBased
+import numpy as np
+
+from .shingle_based import CompactProfile, ShingleBased
 from .string_distance import NormalizedStringDistance
 from .string_similarity import NormalizedStringSimilarity
 
@@ -28,8 +30,8 @@ from .string_similarity import NormalizedStringSimilarity
 class Cosine(ShingleBased, NormalizedStringDistance,
              NormalizedStringSimilarity):
 
-    def __init__(self, k):
-        super().__init__(k)
+    def __init__(self, k, cache=None, compact=False):
+        super().__init__(k, cache, compact)
 
     def distance(self, s0, s1):
         return 1.0 - self.similarity(s0, s1)
@@ -43,15 +45,18 @@ class Cosine(ShingleBased, NormalizedStringDistance,
             return 1.0
         if len(s0) < self.get_k() or len(s1) < self.get_k():
             return 0.0
-        profile0 = self.get_profile(s0)
-        profile1 = self.get_profile(s1)
-        return self._dot_product(profile0, profile1) / (
-                self._norm(profile0) * self._norm(profile1))
+        return self.similarity_profiles(self.profile(s0), self.profile(s1))
 
     def similarity_profiles(self, profile0, profile1):
+        if isinstance(profile0, CompactProfile):
+            counts0, counts1 = profile0.intersect(profile1)
+            return float(np.dot(counts0, counts1)) / (profile0.norm() * profile1.norm())
         return self._dot_product(profile0, profile1) / (
                 self._norm(profile0) * self._norm(profile1))
 
+    def distance_profiles(self, profile0, profile1):
+        return 1.0 - self.similarity_profiles(profile0, profile1)
+
     @staticmethod
     def _dot_product(profile0, profile1):
         small = profile1
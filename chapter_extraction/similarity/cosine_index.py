@@ -0,0 +1,175 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import heapq
+
+import numpy as np
+
+from .shingle_based import ShingleBased
+
+
+class CosineIndex(ShingleBased):
+    """
+    Cosine similarity of a query against a whole corpus at once. Shingles get integer feature ids,
+    the corpus is stored row by row in CSR form and once more feature by feature, and every row
+    norm is computed up front, so a query only touches the rows sharing one of its shingles.
+    Scores are those of Cosine(k).similarity up to rounding, a row whose profile is empty scores 0.
+    """
+
+    def __init__(self, strings, k=3, keys=None):
+        """
+        :param strings: list of str, the corpus
+        :param k: int, shingle length
+        :param keys: list, what query results call each string, its position when None
+        """
+        super().__init__(k)
+        self.keys = list(range(len(strings))) if keys is None else list(keys)
+        if len(self.keys) != len(strings):
+            raise ValueError("Got " + str(len(self.keys)) + " keys for " + str(len(strings)) + " strings")
+        self.vocabulary = dict()
+        self.rows_of = dict()
+        # 相同字符串的行，与 Cosine 一致地直接记为 1.0
+        self.same_rows = []
+        lengths = []
+        indices = []
+        data = []
+        for row, string in enumerate(strings):
+            same = self.rows_of.setdefault(string, [])
+            same.append(row)
+            self.same_rows.append(same)
+            profile = self.get_profile(string)
+            lengths.append(len(profile))
+            for shingle, count in profile.items():
+                indices.append(self.vocabulary.setdefault(shingle, len(self.vocabulary)))
+                data.append(count)
+
+        n = len(strings)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.indices = np.array(indices, dtype=np.int64)
+        self.data = np.array(data, dtype=np.float64)
+        rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        self.norms = np.sqrt(np.bincount(rows, weights=self.data * self.data, minlength=n))
+
+        # 按特征排列的同一份数据，查询时直接取出包含某个 shingle 的所有行
+        order = np.argsort(self.indices, kind="stable")
+        self.feature_rows = rows[order]
+        self.feature_data = self.data[order]
+        self.feature_indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.vocabulary)), out=self.feature_indptr[1:])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def vector(self, string):
+        """
+        :param string: str
+        :return: tuple, (feature ids known to the corpus, their counts, norm over all shingles)
+        """
+        profile = self.get_profile(string)
+        norm = np.sqrt(sum(1.0 * v * v for v in profile.values()))
+        known = [(self.vocabulary[shingle], count) for shingle, count in profile.items() if shingle in self.vocabulary]
+        ids = np.array([i for i, _ in known], dtype=np.int64)
+        counts = np.array([c for _, c in known], dtype=np.float64)
+        return ids, counts, norm
+
+    def _gather(self, ids, counts, after=-1):
+        """rows sharing a feature in ids and the dot product terms, only rows after the given one"""
+        starts, ends = self.feature_indptr[ids], self.feature_indptr[ids + 1]
+        lengths = ends - starts
+        # 各特征的区间拼成一个下标数组，一次取出
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        rows = self.feature_rows[offsets]
+        weights = self.feature_data[offsets] * np.repeat(counts, lengths)
+        if after >= 0:
+            keep = rows > after
+            rows, weights = rows[keep], weights[keep]
+        return rows, weights
+
+    def _scores(self, ids, counts, norm):
+        if len(ids) == 0 or norm == 0:
+            return np.zeros(len(self.keys))
+        rows, weights = self._gather(ids, counts)
+        dot = np.bincount(rows, weights=weights, minlength=len(self.keys))
+        denominator = self.norms * norm
+        return np.divide(dot, denominator, out=np.zeros(len(self.keys)), where=denominator > 0)
+
+    def _scores_after(self, row):
+        """
+        scores of row against the later rows sharing a shingle with it, only those rows are touched
+        :return: tuple, (row numbers in increasing order, their scores)
+        """
+        start, end = self.indptr[row], self.indptr[row + 1]
+        rows, weights = self._gather(self.indices[start:end], self.data[start:end], row)
+        others, inverse = np.unique(rows, return_inverse=True)
+        dot = np.bincount(inverse, weights=weights, minlength=len(others))
+        denominator = self.norms[others] * self.norms[row]
+        return others, np.divide(dot, denominator, out=np.zeros(len(others)), where=denominator > 0)
+
+    def scores(self, string):
+        """
+        :param string: str
+        :return: numpy array, cosine similarity of string with every row of the corpus
+        """
+        if string is None:
+            raise TypeError("Argument string is NoneType.")
+        scores = self._scores(*self.vector(string))
+        for row in self.rows_of.get(string, ()):
+            scores[row] = 1.0
+        return scores
+
+    def top_k(self, string, k=10):
+        """
+        :param string: str
+        :param k: int, number of results
+        :return: list of (key, similarity), most similar first, only rows sharing a shingle with string
+        """
+        scores = self.scores(string)
+        rows = np.flatnonzero(scores)
+        best = heapq.nlargest(k, zip(scores[rows].tolist(), (-rows).tolist()))
+        return [(self.keys[-row], score) for score, row in best]
+
+    def all_pairs(self, threshold=0.9):
+        """
+        Every pair of corpus rows at least threshold similar, e.g. to find duplicated sections
+        :param threshold: float
+        :return: list of (key, key, similarity), the first key from the earlier row
+        """
+        pairs = []
+        for row in range(len(self.keys)):
+            others, scores = self._scores_after(row)
+            if threshold <= 0:
+                # 没有共同 shingle 的行相似度为 0，阈值不大于 0 时同样算数
+                found = dict.fromkeys(range(row + 1, len(self.keys)), 0.0)
+                found.update(zip(others.tolist(), scores.tolist()))
+            else:
+                keep = scores >= threshold
+                found = dict(zip(others[keep].tolist(), scores[keep].tolist()))
+            for other in self.same_rows[row]:
+                if other <= row:
+                    continue
+                if 1.0 >= threshold:
+                    found[other] = 1.0
+                else:
+                    found.pop(other, None)
+            for other in sorted(found):
+                pairs.append((self.keys[row], self.keys[other], found[other]))
+        return pairs
@@ -0,0 +1,67 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import random
+import unittest
+
+import numpy as np
+
+from .cosine import Cosine
+from .cosine_index import CosineIndex
+
+
+class TestCosineIndex(unittest.TestCase):
+
+    def test_cosine_index(self):
+        sections = ["资产管理计划财产的估值", "资产管理计划财产的投资", "委托财产的估值", "第一章 总则", "委托财产的估值"]
+        index = CosineIndex(sections, 2, keys=["a", "b", "c", "d", "e"])
+        a = Cosine(2)
+        query = "资产管理计划财产的估值与会计核算"
+        scores = index.scores(query)
+        for i, section in enumerate(sections):
+            self.assertAlmostEqual(scores[i], a.similarity(query, section))
+
+        top = index.top_k(query, 2)
+        self.assertEqual([key for key, _ in top], ["a", "b"])
+        self.assertEqual(index.top_k("没有共同的字", 3), [])
+
+        pairs = index.all_pairs(0.99)
+        self.assertEqual(pairs, [("c", "e", 1.0)])
+
+    def test_all_pairs(self):
+        random.seed(0)
+        sections = ["".join(random.choice("资产管理计划估值") for _ in range(random.randint(0, 8))) for _ in range(200)]
+        sections += sections[:20]
+        index = CosineIndex(sections, 2)
+        for threshold in [0.0, 0.5, 0.9, 1.0, 1.5]:
+            expected = []
+            for row in range(len(sections)):
+                start, end = index.indptr[row], index.indptr[row + 1]
+                scores = index._scores(index.indices[start:end], index.data[start:end], index.norms[row])
+                for other in index.same_rows[row]:
+                    scores[other] = 1.0
+                for other in np.flatnonzero(scores[row + 1:] >= threshold) + row + 1:
+                    expected.append((row, int(other), float(scores[other])))
+            self.assertEqual(index.all_pairs(threshold), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,10 +18,26 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+
 from .string_distance import MetricStringDistance
 
 
+def _encode(s0, s1):
+    """characters of both strings as small integers, so last occurrences fit in a list"""
+    alphabet = dict()
+    a = [alphabet.setdefault(c, len(alphabet)) for c in s0]
+    b = [alphabet.setdefault(c, len(alphabet)) for c in s1]
+    return a, b, len(alphabet)
+
+
 class Damerau(MetricStringDistance):
+    """
+    Unrestricted Damerau-Levenshtein. A transposition spanning rows i1..i and columns j1..j costs
+    (i - i1 + 1) + (j - j1 + 1) - 3 on top of its start, while plain edits cost at most the larger
+    of the two spans, so it only wins when one of the spans is 2. Hence two rolling rows and, for
+    every column j, the cell before the last row whose character is s1[j - 1] are all that is kept:
+    O(min(len(s0), len(s1))) memory.
+    """
 
     def distance(self, s0, s1):
         if s0 is None:
@@ -30,33 +46,109 @@ class Damerau(MetricStringDistance):
             raise TypeError("Argument s1 is NoneType.")
         if s0 == s1:
             return 0.0
-        inf = int(len(s0) + len(s1))
-        da = dict()
-        for i in range(len(s0)):
-            da[s0[i]] = str(0)
-        for i in range(len(s1)):
-            da[s1[i]] = str(0)
-        h = [[0] * (len(s1) + 2) for _ in range(len(s0) + 2)]
-        for i in range(len(s0) + 1):
-            h[i + 1][0] = inf
-            h[i + 1][1] = i
-        for j in range(len(s1) + 1):
-            h[0][j + 1] = inf
-            h[1][j + 1] = j
-        for i in range(1, len(s0) + 1):
+        if len(s0) < len(s1):
+            s0, s1 = s1, s0
+        a, b, size = _encode(s0, s1)
+        n, m = len(a), len(b)
+
+        # da[c]: 最后一个字符为 c 的行；saved[j]: 该行的上一行在第 j - 2 列的值
+        da = [0] * size
+        saved = [0] * (m + 1)
+        prev2 = [0] * (m + 1)
+        prev = list(range(m + 1))
+        cur = [0] * (m + 1)
+        for i in range(1, n + 1):
+            c0 = a[i - 1]
+            cur[0] = i
             db = 0
-            for j in range(1, len(s1) + 1):
-                i1 = int(da[s1[j - 1]])
+            for j in range(1, m + 1):
+                c1 = b[j - 1]
+                i1 = da[c1]
                 j1 = db
 
                 cost = 1
-                if s0[i - 1] == s1[j - 1]:
+                if c0 == c1:
                     cost = 0
                     db = j
-                h[i + 1][j + 1] = min(h[i][j] + cost,
-                                      h[i + 1][j] + 1,
-                                      h[i][j + 1] + 1,
-                                      h[i1][j1] + (i - i1 - 1) + 1 + (j - j1 - 1))
-            da[s0[i - 1]] = str(i)
+                v = min(prev[j - 1] + cost, cur[j - 1] + 1, prev[j] + 1)
+                if i1 > 0 and j1 > 0:
+                    if j1 == j - 1:
+                        v = min(v, saved[j] + (i - i1 - 1) + 1)
+                    if i1 == i - 1:
+                        v = min(v, prev2[j1 - 1] + 1 + (j - j1 - 1))
+                if cost == 0 and j > 1:
+                    saved[j] = prev[j - 2]
+                cur[j] = v
+            da[c0] = i
+            prev2, prev, cur = prev, cur, prev2
+
+        return prev[m]
+
+    def distance_within(self, s0, s1, k):
+        """
+        Damerau distance if it is at most k, else None. Only the diagonal band of width 2k+1 is
+        filled and the scan stops once no later row can get back under k.
+        """
+        if s0 is None:
+            raise TypeError("Argument s0 is NoneType.")
+        if s1 is None:
+            raise TypeError("Argument s1 is NoneType.")
+        if s0 == s1:
+            return 0.0
+        if abs(len(s0) - len(s1)) > k:
+            return None
+        if len(s0) < len(s1):
+            s0, s1 = s1, s0
+        a, b, size = _encode(s0, s1)
+        n, m = len(a), len(b)
+
+        k = int(k)
+        inf = k + 1
+        da = [0] * size
+        saved = [inf] * (m + 1)
+        # saved[j] 只在记下它的那一行仍是 da 指向的行时有效
+        saved_row = [0] * (m + 1)
+        prev2 = [inf] * (m + 1)
+        prev = [j if j <= k else inf for j in range(m + 1)]
+        cur = [inf] * (m + 1)
+        bound = 0
+
+        for i in range(1, n + 1):
+            lo, hi = max(1, i - k), min(m, i + k)
+            if i <= k:
+                cur[0] = i
+            else:
+                cur[lo - 1] = inf
+            row_min = cur[lo - 1]
+            c0 = a[i - 1]
+            db = 0
+            for j in range(lo, hi + 1):
+                c1 = b[j - 1]
+                i1 = da[c1]
+                j1 = db
+
+                cost = 1
+                if c0 == c1:
+                    cost = 0
+                    db = j
+                v = min(prev[j - 1] + cost, cur[j - 1] + 1, prev[j] + 1, inf)
+                if i1 > 0 and j1 > 0:
+                    if j1 == j - 1 and saved_row[j] == i1:
+                        v = min(v, saved[j] + (i - i1 - 1) + 1)
+                    if i1 == i - 1:
+                        v = min(v, prev2[j1 - 1] + 1 + (j - j1 - 1))
+                if cost == 0 and j > 1:
+                    saved[j] = prev[j - 2] if j - 2 >= i - 1 - k else inf
+                    saved_row[j] = i
+                cur[j] = v
+                if v < row_min:
+                    row_min = v
+            da[c0] = i
+
+            # 换位只会从更早的行跨过来，跨过的每一行至少加 1，所以 bound 以后只增不减
+            bound = min(bound + 1, row_min)
+            if bound > k:
+                return None
+            prev2, prev, cur = prev, cur, prev2
 
-        return h[len(s0) + 1][len(s1) + 1]
+        return prev[m] if prev[m] <= k else None
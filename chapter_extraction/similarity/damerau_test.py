@@ -39,6 +39,15 @@ class TestDamerau(unittest.TestCase):
         print(distance_format.format(str(a.distance(s1, s3)), s1, s3))
         print(distance_format.format(str(a.distance(s2, s3)), s2, s3))
 
+    def test_distance_within(self):
+        a = Damerau()
+        strings = ["", "上海", "上海市", "海上市", "资产管理计划财产的估值", "资产管理计划财产的投资", "第一章 总则"]
+        for s0 in strings:
+            for s1 in strings:
+                d = a.distance(s0, s1)
+                for k in range(5):
+                    self.assertEqual(a.distance_within(s0, s1, k), d if d <= k else None)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -18,15 +18,15 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .shingle_based import ShingleBased
+from .shingle_based import CompactProfile, ShingleBased
 from .string_distance import NormalizedStringDistance, MetricStringDistance
 from .string_similarity import NormalizedStringSimilarity
 
 
 class Jaccard(ShingleBased, MetricStringDistance, NormalizedStringDistance, NormalizedStringSimilarity):
 
-    def __init__(self, k):
-        super().__init__(k)
+    def __init__(self, k, cache=None, compact=False):
+        super().__init__(k, cache, compact)
 
     def distance(self, s0, s1):
         return 1.0 - self.similarity(s0, s1)
@@ -40,8 +40,12 @@ class Jaccard(ShingleBased, MetricStringDistance, NormalizedStringDistance, Norm
             return 1.0
         if len(s0) < self.get_k() or len(s1) < self.get_k():
             return 0.0
-        profile0 = self.get_profile(s0)
-        profile1 = self.get_profile(s1)
+        return self.similarity_profiles(self.profile(s0), self.profile(s1))
+
+    def similarity_profiles(self, profile0, profile1):
+        if isinstance(profile0, CompactProfile):
+            inter = len(profile0.intersect(profile1)[0])
+            return 1.0 * inter / (len(profile0) + len(profile1) - inter)
         union = set()
         for ite in profile0.keys():
             union.add(ite)
@@ -49,3 +53,6 @@ class Jaccard(ShingleBased, MetricStringDistance, NormalizedStringDistance, Norm
             union.add(ite)
         inter = int(len(profile0.keys()) + len(profile1.keys()) - len(union))
         return 1.0 * inter / len(union)
+
+    def distance_profiles(self, profile0, profile1):
+        return 1.0 - self.similarity_profiles(profile0, profile1)
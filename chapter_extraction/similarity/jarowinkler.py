@@ -18,6 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from collections import Counter
+
 from .string_distance import NormalizedStringDistance
 from .string_similarity import NormalizedStringSimilarity
 
@@ -39,7 +41,40 @@ class JaroWinkler(NormalizedStringSimilarity, NormalizedStringDistance):
             raise TypeError("Argument s1 is NoneType.")
         if s0 == s1:
             return 1.0
-        mtp = self.matches(s0, s1)
+        return self._score(s0, s1, self.matches(s0, s1))
+
+    def distance(self, s0, s1):
+        return 1.0 - self.similarity(s0, s1)
+
+    def similarity_many(self, query, candidates, min_score=None):
+        """
+        similarity(query, candidate) for every candidate, the positions of each character of query
+        are collected once and reused. With min_score, a candidate whose upper bound (all common
+        characters matched, no transposition) is below it is skipped without matching
+        :param query: str
+        :param candidates: list of str
+        :param min_score: float, scores below it are returned as None
+        :return: list, float or None for every candidate
+        """
+        if query is None:
+            raise TypeError("Argument query is NoneType.")
+        positions = self.positions(query)
+        counts = dict((c, len(p)) for c, p in positions.items())
+        scores = []
+        for candidate in candidates:
+            if candidate is None:
+                raise TypeError("Argument s1 is NoneType.")
+            if min_score is not None and self._upper_bound(query, candidate, counts) < min_score:
+                scores.append(None)
+                continue
+            if query == candidate:
+                score = 1.0
+            else:
+                score = self._score(query, candidate, self._matches_positions(query, candidate, positions))
+            scores.append(score if min_score is None or score >= min_score else None)
+        return scores
+
+    def _score(self, s0, s1, mtp):
         m = mtp[0]
         if m == 0:
             return 0.0
@@ -49,8 +84,70 @@ class JaroWinkler(NormalizedStringSimilarity, NormalizedStringDistance):
             jw = j + min(self.jw_coef, 1.0 / mtp[self.three]) * mtp[2] * (1 - j)
         return jw
 
-    def distance(self, s0, s1):
-        return 1.0 - self.similarity(s0, s1)
+    def _upper_bound(self, query, candidate, counts):
+        if query == candidate:
+            return 1.0
+        common = 0
+        for c, n in Counter(candidate).items():
+            common += min(n, counts.get(c, 0))
+        if common == 0:
+            return 0.0
+        prefix = 0
+        for c0, c1 in zip(query, candidate):
+            if c0 != c1:
+                break
+            prefix += 1
+        # 相似度随匹配数增加、随换位数减少，而前缀加成不超过 1 - j
+        return self._score(query, candidate, [common, 0, prefix, max(len(query), len(candidate))])
+
+    @staticmethod
+    def positions(s):
+        """positions of every character of s, in increasing order"""
+        positions = dict()
+        for i, c in enumerate(s):
+            positions.setdefault(c, []).append(i)
+        return positions
+
+    @staticmethod
+    def _matches_positions(s0, s1, positions):
+        """
+        matches(s0, s1) from the positions of s0. For one character the window only moves right,
+        so its first free position in the window is found by moving a pointer over its positions.
+        Per character that greedy is a merge of two sorted position lists that takes a pair
+        whenever they are within the window, the same from either side, so s1 is always the one
+        walked whether it is the longer string or not
+        """
+        if len(s0) > len(s1):
+            max_str, min_str = s0, s1
+        else:
+            max_str, min_str = s1, s0
+        ran = int(max(len(max_str) / 2 - 1, 0))
+        pointers = dict()
+        matched = []
+        for i, c in enumerate(s1):
+            p = positions.get(c)
+            if p is None:
+                continue
+            k = pointers.get(c, 0)
+            while k < len(p) and p[k] < i - ran:
+                k += 1
+            if k < len(p) and p[k] <= i + ran:
+                matched.append(p[k])
+                k += 1
+            pointers[c] = k
+
+        # matched 是 s0 中匹配到的位置，按 s1 的顺序排列
+        transpositions = 0
+        for xi, xj in zip(matched, sorted(matched)):
+            if s0[xi] != s0[xj]:
+                transpositions += 1
+        prefix = 0
+        for mi in range(len(min_str)):
+            if s0[mi] == s1[mi]:
+                prefix += 1
+            else:
+                break
+        return [len(matched), int(transpositions / 2), prefix, len(max_str)]
 
     @staticmethod
     def matches(s0, s1):
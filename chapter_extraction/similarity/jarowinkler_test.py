@@ -18,6 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import random
 import unittest
 
 from .jarowinkler import JaroWinkler
@@ -47,6 +48,23 @@ class TestJaroWinkler(unittest.TestCase):
         print(similarity_format.format(str(a.similarity(s1, s3)), s1, s3))
         print(similarity_format.format(str(a.similarity(s2, s3)), s2, s3))
 
+    def test_similarity_many(self):
+        a = JaroWinkler()
+        s0 = "资产管理计划财产的估值"
+        candidates = ["", "资产管理计划财产的估值", "资产管理计划财产的投资", "财产的估值", "委托财产的估值", "第一章 总则",
+                      "资产管理计划财产的估值与会计核算", "委托资产管理计划财产的估值", "估值的财产计划管理资产的估值财产"]
+        scores = [a.similarity(s0, s1) for s1 in candidates]
+        self.assertEqual(a.similarity_many(s0, candidates), scores)
+        self.assertEqual(a.similarity_many(s0, candidates, 0.8), [s if s >= 0.8 else None for s in scores])
+
+    def test_matches_positions(self):
+        random.seed(0)
+        for _ in range(500):
+            s0 = "".join(random.choice("资产估值") for _ in range(random.randint(1, 20)))
+            s1 = "".join(random.choice("资产估值") for _ in range(random.randint(1, 20)))
+            self.assertEqual(JaroWinkler._matches_positions(s0, s1, JaroWinkler.positions(s0)),
+                             JaroWinkler.matches(s0, s1))
+
 
 if __name__ == "__main__":
     unittest.main()
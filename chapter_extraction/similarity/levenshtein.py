@@ -30,11 +30,11 @@ class Levenshtein(MetricStringDistance):
             raise TypeError("Argument s1 is NoneType.")
         if s0 == s1:
             return 0.0
-        if len(s0) == 0:
-            return len(s1)
-        if len(s1) == 0:
-            return len(s1)
+        if len(s0) == 0 or len(s1) == 0:
+            return len(s0) + len(s1)
+        return self._distance(s0, s1)
 
+    def _distance(self, s0, s1):
         v0 = [0] * (len(s1) + 1)
         v1 = [0] * (len(s1) + 1)
 
@@ -51,3 +51,48 @@ class Levenshtein(MetricStringDistance):
             v0, v1 = v1, v0
 
         return v0[len(s1)]
+
+    def distance_within(self, s0, s1, k):
+        """
+        Levenshtein distance if it is at most k, else None. Only the diagonal band of width 2k+1
+        is filled and the scan stops as soon as a whole row exceeds k.
+        """
+        if s0 is None:
+            raise TypeError("Argument s0 is NoneType.")
+        if s1 is None:
+            raise TypeError("Argument s1 is NoneType.")
+        if s0 == s1:
+            return 0.0
+        if len(s0) == 0 or len(s1) == 0:
+            d = len(s0) + len(s1)
+            return d if d <= k else None
+        if abs(len(s0) - len(s1)) > k:
+            return None
+
+        k = int(k)
+        inf = k + 1
+        n, m = len(s0), len(s1)
+        v0 = [j if j <= k else inf for j in range(m + 1)]
+        v1 = [inf] * (m + 1)
+
+        for i in range(n):
+            lo, hi = max(1, i + 1 - k), min(m, i + 1 + k)
+            if i + 1 <= k:
+                v1[0] = i + 1
+            else:
+                v1[lo - 1] = inf
+            row_min = v1[lo - 1]
+            for j in range(lo, hi + 1):
+                cost = 1
+                if s0[i] == s1[j - 1]:
+                    cost = 0
+                v = min(v1[j - 1] + 1, v0[j] + 1, v0[j - 1] + cost, inf)
+                v1[j] = v
+                if v < row_min:
+                    row_min = v
+            if row_min > k:
+                return None
+            v0, v1 = v1, v0
+
+        return v0[m] if v0[m] <= k else None
+
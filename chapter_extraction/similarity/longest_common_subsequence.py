@@ -20,6 +20,7 @@
 
 import numpy as np
 
+from .bit_parallel import lcs_length
 from .string_distance import StringDistance
 
 
@@ -35,6 +36,23 @@ class LongestCommonSubsequence(StringDistance):
 
     @staticmethod
     def length(s0, s1):
+        if s0 is None:
+            raise TypeError("Argument s0 is NoneType.")
+        if s1 is None:
+            raise TypeError("Argument s1 is NoneType.")
+        if len(s0) > len(s1):
+            s0, s1 = s1, s0
+        return lcs_length(s0, s1)
+
+    @staticmethod
+    def subsequence(s0, s1):
+        """
+        The longest common subsequence itself, read back from the full DP matrix,
+        O(len(s0) * len(s1)) time and memory, use length() when only the length is needed
+        :param s0: str
+        :param s1: str
+        :return: str
+        """
         if s0 is None:
             raise TypeError("Argument s0 is NoneType.")
         if s1 is None:
@@ -42,11 +60,22 @@ class LongestCommonSubsequence(StringDistance):
         s0_len, s1_len = len(s0), len(s1)
         x, y = s0[:], s1[:]
         n, m = s0_len + 1, s1_len + 1
-        matrix = np.zeros((n, m))
+        matrix = np.zeros((n, m), dtype=np.int64)
         for i in range(1, s0_len + 1):
             for j in range(1, s1_len + 1):
                 if x[i - 1] == y[j - 1]:
                     matrix[i][j] = matrix[i - 1][j - 1] + 1
                 else:
                     matrix[i][j] = max(matrix[i][j - 1], matrix[i - 1][j])
-        return matrix[s0_len][s1_len]
+
+        chars = []
+        i, j = s0_len, s1_len
+        while i > 0 and j > 0:
+            if x[i - 1] == y[j - 1]:
+                chars.append(x[i - 1])
+                i, j = i - 1, j - 1
+            elif matrix[i - 1][j] >= matrix[i][j - 1]:
+                i -= 1
+            else:
+                j -= 1
+        return "".join(reversed(chars))
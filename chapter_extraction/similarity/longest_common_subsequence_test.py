@@ -18,6 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import random
 import unittest
 
 from .longest_common_subsequence import LongestCommonSubsequence
@@ -39,6 +40,20 @@ class TestLongestCommonSubsequence(unittest.TestCase):
         print(distance_format.format(str(a.distance(s1, s3)), s1, s3))
         print(distance_format.format(str(a.distance(s2, s3)), s2, s3))
 
+    def test_length(self):
+        random.seed(0)
+        for _ in range(200):
+            s0 = "".join(random.choice("资产管理计划") for _ in range(random.randint(0, 80)))
+            s1 = "".join(random.choice("资产管理估值") for _ in range(random.randint(0, 80)))
+            length = LongestCommonSubsequence.length(s0, s1)
+            subsequence = LongestCommonSubsequence.subsequence(s0, s1)
+            self.assertEqual(length, len(subsequence))
+            self.assertEqual(length, LongestCommonSubsequence.length(s1, s0))
+            # subsequence 确实是两边的公共子序列
+            for s in (s0, s1):
+                it = iter(s)
+                self.assertTrue(all(c in it for c in subsequence))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,189 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+
+import numpy as np
+
+from .minhash import MinHash
+from .shingle_based import ShingleBased
+
+
+def optimal_bands(threshold, num_perm):
+    """
+    The (bands, rows) split of num_perm signature values whose candidate curve 1 - (1 - s^rows)^bands
+    has the least false positive plus false negative area around threshold
+    """
+    best = None
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        below = np.linspace(0.0, threshold, 101)
+        above = np.linspace(threshold, 1.0, 101)
+        false_positive = np.mean(1.0 - (1.0 - below ** rows) ** bands) * threshold
+        false_negative = np.mean((1.0 - above ** rows) ** bands) * (1.0 - threshold)
+        error = false_positive + false_negative
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class LSH:
+    """
+    Banded locality sensitive hashing over MinHash signatures. Each signature is cut into bands, two
+    sections become candidates when any band is identical, so a query only looks at the buckets of
+    its own bands instead of the whole library. Candidates are re-ranked with the exact Jaccard
+    similarity of their shingle sets, kept as sorted 64-bit shingle ids rather than the section text;
+    a section without any k-shingle matches nothing.
+    """
+
+    def __init__(self, threshold=0.5, k=3, num_perm=128, seed=1, bands=None):
+        """
+        :param threshold: float, Jaccard similarity the bands are tuned for and query() filters at
+        :param k: int, shingle length
+        :param num_perm: int, signature length
+        :param seed: int, seed of the MinHash permutations
+        :param bands: int, number of bands, chosen from threshold when None
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold should be in (0, 1], got " + str(threshold))
+        self.threshold = threshold
+        self.minhash = MinHash(k, num_perm, seed)
+        self.shingler = ShingleBased(k)
+        if bands is None:
+            self.bands, self.rows = optimal_bands(threshold, num_perm)
+        else:
+            self.bands, self.rows = bands, num_perm // bands
+        self.tables = [dict() for _ in range(self.bands)]
+        self.keys = dict()
+        self.shingles = dict()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def _band_keys(self, signature):
+        # bytes 而不是 hash()，后者每个进程的随机种子不同，保存后无法复用
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def insert(self, key, string, signature=None):
+        """
+        :param key: hashable, section id
+        :param string: str, section text, its shingle ids are kept for the exact re-ranking
+        :param signature: numpy array, self.minhash.signature(string) when it is already known
+        """
+        if key in self.keys:
+            raise ValueError("Key already in the index: " + str(key))
+        if signature is None:
+            signature = self.minhash.signature(string)
+        band_keys = self._band_keys(signature)
+        for table, band_key in zip(self.tables, band_keys):
+            table.setdefault(band_key, set()).add(key)
+        self.keys[key] = band_keys
+        self.shingles[key] = self.shingler.get_compact_profile(string).ids
+
+    def remove(self, key):
+        band_keys = self.keys.pop(key)
+        for table, band_key in zip(self.tables, band_keys):
+            bucket = table[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del table[band_key]
+        del self.shingles[key]
+
+    def candidates(self, string, signature=None):
+        """keys sharing at least one band with string, unranked"""
+        if signature is None:
+            signature = self.minhash.signature(string)
+        found = set()
+        for table, band_key in zip(self.tables, self._band_keys(signature)):
+            found.update(table.get(band_key, ()))
+        return found
+
+    def query(self, string, threshold=None, limit=None):
+        """
+        To find the stored sections whose Jaccard similarity with string is at least threshold
+        :param string: str
+        :param threshold: float, self.threshold when None
+        :param limit: int, keep only the best limit results
+        :return: list of (key, similarity), most similar first
+        """
+        if threshold is None:
+            threshold = self.threshold
+        ids = self.shingler.get_compact_profile(string).ids
+        results = []
+        for key in self.candidates(string):
+            score = jaccard_ids(ids, self.shingles[key])
+            if score >= threshold:
+                results.append((key, score))
+        results.sort(key=lambda x: -x[1])
+        return results if limit is None else results[:limit]
+
+    def save(self, path):
+        """
+        To write the index as a numpy .npz file, no pickle, so loading a shared file runs no code.
+        Keys have to be JSON values such as str or int
+        """
+        keys = list(self.keys)
+        shingles = [self.shingles[key] for key in keys]
+        indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in shingles], out=indptr[1:])
+        width = self.bands * self.rows
+        signatures = np.frombuffer(b"".join(b"".join(self.keys[key]) for key in keys), dtype=np.uint64)
+        config = [self.threshold, self.minhash.k, self.minhash.num_perm, self.minhash.seed, self.bands]
+        with open(path, "wb") as temp:
+            np.savez(temp, config=np.array(json.dumps(config)), keys=np.array(json.dumps(keys)),
+                     signatures=signatures.reshape(len(keys), width),
+                     shingles=np.concatenate(shingles) if shingles else np.zeros(0, dtype=np.uint64),
+                     indptr=indptr)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as temp:
+            try:
+                data = np.load(temp, allow_pickle=False)
+            except ValueError as e:
+                raise ValueError("Not an LSH index: " + path + ", " + str(e))
+            if not isinstance(data, np.lib.npyio.NpzFile):
+                raise ValueError("Not an LSH index: " + path)
+            with data:
+                if "config" not in data.files:
+                    raise ValueError("Not an LSH index: " + path)
+                threshold, k, num_perm, seed, bands = json.loads(str(data["config"]))
+                keys = json.loads(str(data["keys"]))
+                signatures, shingles, indptr = data["signatures"], data["shingles"], data["indptr"]
+        index = LSH(threshold, k, num_perm, seed, bands)
+        for i, key in enumerate(keys):
+            band_keys = index._band_keys(signatures[i])
+            for table, band_key in zip(index.tables, band_keys):
+                table.setdefault(band_key, set()).add(key)
+            index.keys[key] = band_keys
+            index.shingles[key] = shingles[indptr[i]:indptr[i + 1]].copy()
+        return index
+
+
+def jaccard_ids(ids0, ids1):
+    """Jaccard similarity of two sorted arrays of distinct shingle ids, 0 when either is empty"""
+    if len(ids0) == 0 or len(ids1) == 0:
+        return 0.0
+    inter = len(np.intersect1d(ids0, ids1, assume_unique=True))
+    return 1.0 * inter / (len(ids0) + len(ids1) - inter)
@@ -0,0 +1,98 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from .jaccard import Jaccard
+from .lsh import LSH
+
+
+class TestLSH(unittest.TestCase):
+
+    def test_lsh(self):
+        sections = {
+            "valuation": "资产管理计划财产的估值与会计核算，估值日为每个交易日",
+            "investment": "资产管理计划财产的投资范围及投资限制",
+            "general": "第一章 总则 本合同依据相关法律法规制定",
+        }
+        index = LSH(threshold=0.5, k=2)
+        for key, section in sections.items():
+            index.insert(key, section)
+        self.assertEqual(len(index), 3)
+
+        query = "资产管理计划财产的估值与会计核算，估值日为每个工作日"
+        results = index.query(query)
+        self.assertEqual(results[0][0], "valuation")
+        self.assertNotIn("general", [key for key, _ in results])
+
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp, "sections.lsh")
+            index.save(path)
+            loaded = LSH.load(path)
+        self.assertEqual(loaded.query(query), results)
+
+        loaded.remove("valuation")
+        self.assertNotIn("valuation", loaded)
+        self.assertEqual(loaded.query(query), [])
+        self.assertTrue(all(key != "valuation" for table in loaded.tables for bucket in table.values() for key in bucket))
+
+    def test_rerank_and_format(self):
+        random.seed(0)
+        sections = ["".join(random.choice("资产管理计划财产估值投资") for _ in range(random.randint(5, 30)))
+                    for _ in range(100)]
+        index = LSH(threshold=0.3, k=2)
+        for key, section in enumerate(sections):
+            index.insert(key, section)
+        # 只存 shingle 的编号，不存原文
+        self.assertFalse(hasattr(index, "documents"))
+        self.assertEqual(index.shingles[0].dtype, np.uint64)
+        jaccard = Jaccard(2)
+        for query in sections[:20]:
+            results = index.query(query)
+            self.assertIn(sections.index(query), dict(results))
+            self.assertEqual(dict(results), dict((key, jaccard.similarity(query, sections[key]))
+                                                 for key in index.candidates(query)
+                                                 if jaccard.similarity(query, sections[key]) >= 0.3))
+
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp, "sections.lsh")
+            index.save(path)
+            loaded = LSH.load(path)
+            self.assertEqual((loaded.bands, loaded.rows, loaded.threshold), (index.bands, index.rows, index.threshold))
+            self.assertEqual(loaded.tables, index.tables)
+            for query in sections[:20]:
+                self.assertEqual(loaded.query(query), index.query(query))
+
+            # 不接受 pickle 文件
+            with open(path, "wb") as temp_file:
+                pickle.dump(index, temp_file)
+            with self.assertRaises(ValueError):
+                LSH.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
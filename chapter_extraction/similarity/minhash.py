@@ -0,0 +1,77 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import hashlib
+
+import numpy as np
+
+from .shingle_based import ShingleBased
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingle_hash(shingle):
+    """32-bit hash of a shingle, stable across processes unlike hash()"""
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHash(ShingleBased):
+    """
+    MinHash signatures of k-shingle sets: num_perm random permutations (a * h + b) mod p of the
+    shingle hashes, the signature keeps the smallest value of each. Two signatures agree in about
+    a Jaccard similarity fraction of their positions.
+    """
+
+    def __init__(self, k=3, num_perm=128, seed=1):
+        super().__init__(k)
+        self.num_perm = num_perm
+        self.seed = seed
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, string):
+        """
+        :param string: str
+        :return: numpy uint64 array of num_perm values
+        """
+        if string is None:
+            raise TypeError("Argument string is NoneType.")
+        return self.signature_profile(self.profile(string))
+
+    def signature_profile(self, profile):
+        if len(profile) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter((shingle_hash(shingle) for shingle in profile), dtype=np.uint64, count=len(profile))
+        # uint64 乘法溢出回绕，和常见实现一致，最后只取低 32 位
+        permuted = ((np.outer(hashes, self.a) + self.b) % np.uint64(_MERSENNE_PRIME)) & np.uint64(_MAX_HASH)
+        return permuted.min(axis=0)
+
+    def signatures(self, strings):
+        return [self.signature(string) for string in strings]
+
+    @staticmethod
+    def jaccard(signature0, signature1):
+        """estimated Jaccard similarity of the shingle sets behind two signatures"""
+        if len(signature0) != len(signature1):
+            raise ValueError("Signatures of different lengths: " + str(len(signature0)) + ", " + str(len(signature1)))
+        return float(np.count_nonzero(signature0 == signature1)) / len(signature0)
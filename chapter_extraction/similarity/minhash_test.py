@@ -0,0 +1,45 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+
+from .jaccard import Jaccard
+from .minhash import MinHash
+
+
+class TestMinHash(unittest.TestCase):
+
+    def test_minhash(self):
+        a = MinHash(2, num_perm=256)
+        s0 = "资产管理计划财产的估值与会计核算"
+        s1 = "资产管理计划财产的投资与会计核算"
+        s2 = "第一章 总则"
+        jaccard = Jaccard(2)
+        estimate_format = "estimate: {:.4}\t exact: {:.4}\t between {} and {}"
+        for s in [s1, s2]:
+            estimate = a.jaccard(a.signature(s0), a.signature(s))
+            print(estimate_format.format(estimate, jaccard.similarity(s0, s), s0, s))
+            self.assertAlmostEqual(estimate, jaccard.similarity(s0, s), delta=0.15)
+        self.assertEqual(a.jaccard(a.signature(s0), MinHash(2, num_perm=256).signature(s0)), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,7 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .levenshtein import Levenshtein
+from .bit_parallel_levenshtein import BitParallelLevenshtein
 from .string_distance import NormalizedStringDistance
 from .string_similarity import NormalizedStringSimilarity
 
@@ -26,7 +26,7 @@ from .string_similarity import NormalizedStringSimilarity
 class NormalizedLevenshtein(NormalizedStringDistance, NormalizedStringSimilarity):
 
     def __init__(self):
-        self.levenshtein = Levenshtein()
+        self.levenshtein = BitParallelLevenshtein()
 
     def distance(self, s0, s1):
         if s0 is None:
@@ -18,8 +18,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import numpy as np
-
 from .string_distance import StringDistance
 
 
@@ -34,25 +32,80 @@ class OptimalStringAlignment(StringDistance):
             return 0.0
 
         n, m = len(s0), len(s1)
-        if n == 0:
-            return 1.0 * n
-        if m == 0:
-            return 1.0 * m
+        if n == 0 or m == 0:
+            return 1.0 * (n + m)
 
-        d = np.zeros((n + 2, m + 2))
-        for i in range(n + 1):
-            d[i][0] = i
-        for j in range(m + 1):
-            d[0][j] = j
+        # 换位最多回看两行，三行滚动即可，列取较短的字符串
+        if n < m:
+            s0, s1, n, m = s1, s0, m, n
+        d0 = [0] * (m + 1)
+        d1 = list(range(m + 1))
+        d2 = [0] * (m + 1)
 
         for i in range(1, n + 1):
+            d2[0] = i
             for j in range(1, m + 1):
                 cost = 1
                 if s0[i - 1] == s1[j - 1]:
                     cost = 0
-                d[i][j] = min(d[i - 1][j - 1] + cost, d[i][j - 1] + 1, d[i - 1][j] + 1)
+                v = min(d1[j - 1] + cost, d2[j - 1] + 1, d1[j] + 1)
+
+                if i > 1 and j > 1 and s0[i - 1] == s1[j - 2] and s0[i - 2] == s1[j - 1]:
+                    v = min(v, d0[j - 2] + cost)
+                d2[j] = v
+            d0, d1, d2 = d1, d2, d0
+
+        return 1.0 * d1[m]
+
+    def distance_within(self, s0, s1, k):
+        """
+        OSA distance if it is at most k, else None. Only the diagonal band of width 2k+1 is filled
+        and the scan stops once two consecutive rows exceed k, since a transposition reaches back
+        two rows.
+        """
+        if s0 is None:
+            raise TypeError("Argument s0 is NoneType.")
+        if s1 is None:
+            raise TypeError("Argument s1 is NoneType.")
+        if s0 == s1:
+            return 0.0
+
+        n, m = len(s0), len(s1)
+        if n == 0 or m == 0:
+            d = self.distance(s0, s1)
+            return d if d <= k else None
+        if abs(n - m) > k:
+            return None
+
+        k = int(k)
+        inf = k + 1
+        d0 = [inf] * (m + 1)
+        d1 = [j if j <= k else inf for j in range(m + 1)]
+        d2 = [inf] * (m + 1)
+        last_min = 0
+
+        for i in range(1, n + 1):
+            lo, hi = max(1, i - k), min(m, i + k)
+            if i <= k:
+                d2[0] = i
+            else:
+                d2[lo - 1] = inf
+            row_min = d2[lo - 1]
+            for j in range(lo, hi + 1):
+                cost = 1
+                if s0[i - 1] == s1[j - 1]:
+                    cost = 0
+                v = min(d1[j - 1] + cost, d2[j - 1] + 1, d1[j] + 1, inf)
 
                 if i > 1 and j > 1 and s0[i - 1] == s1[j - 2] and s0[i - 2] == s1[j - 1]:
-                    d[i][j] = min(d[i][j], d[i - 2][j - 2] + cost)
+                    v = min(v, d0[j - 2] + cost)
+                d2[j] = v
+                if v < row_min:
+                    row_min = v
+            if row_min > k and last_min > k:
+                return None
+            last_min = row_min
+            d0, d1, d2 = d1, d2, d0
+
+        return d1[m] if d1[m] <= k else None
 
-        return d[n][m]
@@ -39,6 +39,24 @@ class TestOptimalStringAlignment(unittest.TestCase):
         print(distance_format.format(str(a.distance(s1, s3)), s1, s3))
         print(distance_format.format(str(a.distance(s2, s3)), s2, s3))
 
+    def test_empty(self):
+        a = OptimalStringAlignment()
+        self.assertEqual(a.distance("", ""), 0)
+        self.assertEqual(a.distance("abc", ""), 3)
+        self.assertEqual(a.distance("", "上海市"), 3)
+        self.assertEqual(a.distance_within("abc", "", 3), 3)
+        self.assertIsNone(a.distance_within("abc", "", 2))
+        self.assertIsNone(a.distance_within("", "abc", 2))
+
+    def test_distance_within(self):
+        a = OptimalStringAlignment()
+        strings = ["", "上海", "上海市", "海上市", "资产管理计划财产的估值", "资产管理计划财产的投资", "第一章 总则"]
+        for s0 in strings:
+            for s1 in strings:
+                d = a.distance(s0, s1)
+                for k in range(5):
+                    self.assertEqual(a.distance_within(s0, s1, k), d if d <= k else None)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -18,14 +18,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .shingle_based import ShingleBased
+import numpy as np
+
+from .shingle_based import CompactProfile, ShingleBased
 from .string_distance import StringDistance
 
 
 class QGram(ShingleBased, StringDistance):
 
-    def __init__(self, k=3):
-        super().__init__(k)
+    def __init__(self, k=3, cache=None, compact=False):
+        super().__init__(k, cache, compact)
 
     def distance(self, s0, s1):
         if s0 is None:
@@ -35,12 +37,17 @@ class QGram(ShingleBased, StringDistance):
         if s0 == s1:
             return 0.0
 
-        profile0 = self.get_profile(s0)
-        profile1 = self.get_profile(s1)
+        return self.distance_profile(self.profile(s0), self.profile(s1))
+
+    def distance_profiles(self, profile0, profile1):
         return self.distance_profile(profile0, profile1)
 
     @staticmethod
     def distance_profile(profile0, profile1):
+        if isinstance(profile0, CompactProfile):
+            # 并集上 |v0 - v1| 之和 = 两边总数之和 - 2 * 共有部分的较小值之和
+            counts0, counts1 = profile0.intersect(profile1)
+            return profile0.total() + profile1.total() - 2 * int(np.minimum(counts0, counts1).sum())
         union = set()
         for k in profile0.keys():
             union.add(k)
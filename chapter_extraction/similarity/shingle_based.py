@@ -19,19 +19,126 @@
 # SOFTWARE.
 
 import re
+from collections import OrderedDict
+
+import numpy as np
 
 _SPACE_PATTERN = re.compile("\\s+")
 
+# 码位小于 2^21，k <= 3 时按 2^21 进制编码的 shingle id 不会冲突；更长的 shingle 用奇数基的 64 位滚动哈希
+_EXACT_BASE = 1 << 21
+_EXACT_K = 3
+_HASH_BASE = 0x9E3779B97F4A7C15
+
+
+class CompactProfile:
+    """
+    A shingle profile as two numpy arrays instead of a dict of strings: the sorted 64-bit ids of
+    the distinct shingles and how often each occurs. Profiles are compared by merging the sorted ids.
+    """
+
+    def __init__(self, ids, counts):
+        self.ids = ids
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactProfile) and np.array_equal(self.ids, other.ids) \
+            and np.array_equal(self.counts, other.counts)
+
+    def intersect(self, other):
+        """counts in self and in other of the shingles they share"""
+        _, i0, i1 = np.intersect1d(self.ids, other.ids, assume_unique=True, return_indices=True)
+        return self.counts[i0], other.counts[i1]
+
+    def total(self):
+        return int(self.counts.sum())
+
+    def norm(self):
+        return float(np.sqrt(np.dot(self.counts, self.counts)))
+
+
+class ProfileCache:
+    """
+    The shingle profiles of the most recently used (k, string) pairs, dict and CompactProfile ones
+    apart, shared by every ShingleBased
+    metric so a string compared by several metrics or against many others is shingled once.
+    Cached profiles are shared, callers must not modify them.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.profiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def get(self, k, string, build, compact=False):
+        key = (k, compact, string)
+        profile = self.profiles.get(key)
+        if profile is not None:
+            self.profiles.move_to_end(key)
+            self.hits += 1
+            return profile
+        self.misses += 1
+        profile = build(string)
+        self.profiles[key] = profile
+        if len(self.profiles) > self.max_size:
+            self.profiles.popitem(last=False)
+        return profile
+
+    def clear(self):
+        self.profiles.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return self.hits, self.misses
+
+
+_cache = ProfileCache()
+
+
+def configure_profile_cache(max_size=4096):
+    global _cache
+    _cache = ProfileCache(max_size)
+    return _cache
+
+
+def get_profile_cache():
+    return _cache
+
 
 class ShingleBased:
 
-    def __init__(self, k=3):
+    def __init__(self, k=3, cache=None, compact=False):
+        """
+        :param k: int, shingle length
+        :param cache: ProfileCache, the shared one from get_profile_cache() when None
+        :param compact: bool, build CompactProfile instead of dict profiles
+        """
         self.k = k
+        self.cache = cache
+        self.compact = compact
 
     def get_k(self):
         return self.k
 
+    def profile(self, string):
+        """the cached profile of string, build it with get_profile() only on a miss"""
+        cache = self.cache if self.cache is not None else get_profile_cache()
+        return cache.get(self.k, string, self.get_profile, self.compact)
+
+    def profiles(self, strings):
+        return [self.profile(string) for string in strings]
+
     def get_profile(self, string):
+        if self.compact:
+            return self.get_compact_profile(string)
         shingles = dict()
         no_space_str = _SPACE_PATTERN.sub("", string)
         for i in range(len(no_space_str) - self.k + 1):
@@ -42,3 +149,21 @@ class ShingleBased:
             else:
                 shingles[str(shingle)] = 1
         return shingles
+
+    def get_compact_profile(self, string):
+        """
+        Rabin-Karp ids of the k-shingles, computed for all windows at once, one pass per position in
+        the window, then counted with np.unique
+        """
+        no_space_str = _SPACE_PATTERN.sub("", string)
+        n = len(no_space_str) - self.k + 1
+        if n <= 0:
+            return CompactProfile(np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64))
+        codes = np.frombuffer(no_space_str.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        base = np.uint64(_EXACT_BASE if self.k <= _EXACT_K else _HASH_BASE)
+        ids = np.zeros(n, dtype=np.uint64)
+        for i in range(self.k):
+            # uint64 溢出即按 2^64 取模
+            ids = ids * base + codes[i:i + n]
+        ids, counts = np.unique(ids, return_counts=True)
+        return CompactProfile(ids, counts.astype(np.int64))
@@ -0,0 +1,78 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+
+from .cosine import Cosine
+from .jaccard import Jaccard
+from .qgram import QGram
+from .shingle_based import ProfileCache
+from .sorensen_dice import SorensenDice
+
+
+class TestShingleBased(unittest.TestCase):
+
+    def test_profile_cache(self):
+        cache = ProfileCache()
+        metrics = [Cosine(2, cache), Jaccard(2, cache), SorensenDice(2, cache), QGram(2, cache)]
+        sections = ["资产管理计划财产的估值", "资产管理计划财产的投资", "委托财产的估值"]
+        templates = ["财产的估值", "会计核算资产估值"]
+        for a in metrics:
+            for s0 in sections:
+                for s1 in templates:
+                    a.distance(s0, s1)
+        # 同一个 k 下每个字符串只切分一次
+        self.assertEqual(cache.stats()[1], len(sections) + len(templates))
+        self.assertEqual(len(cache), len(sections) + len(templates))
+
+        small = ProfileCache(max_size=2)
+        a = Jaccard(2, small)
+        for s in sections:
+            a.profile(s)
+        a.profile(sections[0])
+        self.assertEqual(len(small), 2)
+        self.assertEqual(small.stats(), (0, 4))
+
+    def test_profiles(self):
+        s0 = "资产管理计划财产的估值"
+        s1 = "资产管理计划财产的投资"
+        for a in [Cosine(2), Jaccard(2), SorensenDice(2), QGram(2)]:
+            profile0, profile1 = a.profiles([s0, s1])
+            self.assertEqual(a.distance_profiles(profile0, profile1), a.distance(s0, s1))
+            self.assertEqual(profile0, a.get_profile(s0))
+
+    def test_compact_profiles(self):
+        strings = ["", "上海", "资产管理计划财产的估值", "资产管理计划 财产的投资", "委托财产的估值估值"]
+        for k in [2, 3, 5]:
+            for cls in [Cosine, Jaccard, SorensenDice, QGram]:
+                a, b = cls(k), cls(k, compact=True)
+                for s0 in strings[2:]:
+                    for s1 in strings[2:]:
+                        self.assertAlmostEqual(a.distance(s0, s1), b.distance(s0, s1))
+            a = Jaccard(k, compact=True)
+            for s in strings:
+                profile = a.get_profile(s)
+                self.assertEqual(len(profile), len(Jaccard(k).get_profile(s)))
+                self.assertEqual(profile.total(), sum(Jaccard(k).get_profile(s).values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,21 +18,29 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import copy
+import heapq
+from concurrent.futures import ProcessPoolExecutor
 from enum import IntEnum
 
-from master_ai.core.similarity.cosine import Cosine
-from master_ai.core.similarity.damerau import Damerau
-from master_ai.core.similarity.jaccard import Jaccard
-from master_ai.core.similarity.jarowinkler import JaroWinkler
-from master_ai.core.similarity.levenshtein import Levenshtein
-from master_ai.core.similarity.longest_common_subsequence import LongestCommonSubsequence
-from master_ai.core.similarity.metric_lcs import MetricLCS
-from master_ai.core.similarity.ngram import NGram
-from master_ai.core.similarity.normalized_levenshtein import NormalizedLevenshtein
-from master_ai.core.similarity.optimal_string_alignment import OptimalStringAlignment
-from master_ai.core.similarity.qgram import QGram
-from master_ai.core.similarity.sorensen_dice import SorensenDice
-from master_ai.core.similarity.weighted_levenshtein import WeightedLevenshtein
+import numpy as np
+
+from .bit_parallel_levenshtein import BitParallelLevenshtein
+from .cosine import Cosine
+from .cosine_index import CosineIndex
+from .damerau import Damerau
+from .jaccard import Jaccard
+from .jarowinkler import JaroWinkler
+from .levenshtein import Levenshtein
+from .longest_common_subsequence import LongestCommonSubsequence
+from .metric_lcs import MetricLCS
+from .ngram import NGram
+from .normalized_levenshtein import NormalizedLevenshtein
+from .optimal_string_alignment import OptimalStringAlignment
+from .qgram import QGram
+from .shingle_based import ProfileCache, ShingleBased
+from .sorensen_dice import SorensenDice
+from .weighted_levenshtein import WeightedLevenshtein
 
 
 class Algorithm(IntEnum):
@@ -49,17 +57,22 @@ class Algorithm(IntEnum):
     Q_GRAM = 11
     SORENSEN_DICE = 12
     WEIGHTED_LEVENSHTEIN = 13
+    BIT_PARALLEL_LEVENSHTEIN = 14
 
 
 class Factory:
     @staticmethod
-    def get_algorithm(algorithm: Algorithm, k=3):
+    def get_algorithm(algorithm: Algorithm, k=None):
+        """
+        :param k: int, shingle or n-gram length, each class's own default when None (3 for those without one)
+        """
+        shingle_k = 3 if k is None else k
         if algorithm == Algorithm.COSINE:
-            return Cosine(k)
+            return Cosine(shingle_k)
         elif algorithm == Algorithm.DAMERAU:
             return Damerau()
         elif algorithm == Algorithm.JACCARD:
-            return Jaccard(k)
+            return Jaccard(shingle_k)
         elif algorithm == Algorithm.JARO_WINKLE:
             return JaroWinkler()
         elif algorithm == Algorithm.LEVENSHTEIN:
@@ -69,23 +82,104 @@ class Factory:
         elif algorithm == Algorithm.METRIC_LCS:
             return MetricLCS()
         elif algorithm == Algorithm.N_GRAM:
-            return NGram()
+            return NGram() if k is None else NGram(k)
         elif algorithm == Algorithm.NORMALIZED_LEVENSHTEIN:
             return NormalizedLevenshtein()
         elif algorithm == Algorithm.OPTIMAL_STRING_ALIGNMENT:
             return OptimalStringAlignment()
         elif algorithm == Algorithm.Q_GRAM:
-            return QGram()
+            return QGram() if k is None else QGram(k)
         elif algorithm == Algorithm.SORENSEN_DICE:
-            return SorensenDice(k)
+            return SorensenDice(shingle_k)
         elif algorithm == Algorithm.WEIGHTED_LEVENSHTEIN:
             raise TypeError("This method does not support create weighted_levenshtein algorithm.")
+        elif algorithm == Algorithm.BIT_PARALLEL_LEVENSHTEIN:
+            return BitParallelLevenshtein()
         else:
-            return Cosine(k)
+            return Cosine(shingle_k)
 
     @staticmethod
     def get_weighted_levenshtein(char_sub, char_change):
         return WeightedLevenshtein(char_sub, char_change)
+
+    @staticmethod
+    def distance_matrix(queries, candidates, algorithm: Algorithm, n_jobs=1, k=None):
+        """
+        Distance of every query to every candidate, split into blocks over a process pool
+        :param queries: list of str
+        :param candidates: list of str
+        :param algorithm: Algorithm, or an algorithm object with distance(), e.g. a WeightedLevenshtein
+        :param n_jobs: int, number of processes, 1 runs in this process
+        :param k: int, shingle length of the shingle based algorithms, as in get_algorithm when None
+        :return: numpy array, len(queries) x len(candidates)
+        """
+        queries, candidates = list(queries), list(candidates)
+        if n_jobs <= 1 or len(queries) * len(candidates) <= 1:
+            return _distance_block(queries, candidates, algorithm, k)
+
+        # 查询多时按行分块，否则（比如 top_k 只有一个查询）按列分块
+        by_rows = len(queries) >= n_jobs
+        items = queries if by_rows else candidates
+        size = max(1, -(-len(items) // (n_jobs * 4)))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            if by_rows:
+                blocks = pool.map(_distance_block, chunks, [candidates] * len(chunks),
+                                  [algorithm] * len(chunks), [k] * len(chunks))
+                return np.vstack(list(blocks))
+            blocks = pool.map(_distance_block, [queries] * len(chunks), chunks,
+                              [algorithm] * len(chunks), [k] * len(chunks))
+            return np.hstack(list(blocks))
+
+    @staticmethod
+    def top_k(query, candidates, k=10, algorithm: Algorithm = Algorithm.BIT_PARALLEL_LEVENSHTEIN, n_jobs=1,
+              shingle_k=None):
+        """
+        The k candidates closest to query
+        :param query: str
+        :param candidates: list of str
+        :param k: int, number of results
+        :param algorithm: Algorithm, or an algorithm object with distance()
+        :param n_jobs: int, number of processes
+        :param shingle_k: int, shingle length of the shingle based algorithms, as in get_algorithm when None
+        :return: list of (candidate index, distance), closest first
+        """
+        distances = Factory.distance_matrix([query], candidates, algorithm, n_jobs, shingle_k)[0]
+        best = heapq.nsmallest(k, zip(distances.tolist(), range(len(distances))))
+        return [(i, d) for d, i in best]
+
+
+def _distance_block(queries, candidates, algorithm, k):
+    """queries x candidates distances in one process, with the fastest path each algorithm has"""
+    matrix = np.zeros((len(queries), len(candidates)))
+    if not isinstance(algorithm, Algorithm):
+        a = algorithm
+    elif algorithm == Algorithm.WEIGHTED_LEVENSHTEIN:
+        raise TypeError("This method does not support create weighted_levenshtein algorithm.")
+    elif algorithm == Algorithm.LEVENSHTEIN:
+        # 结果相同，直接用位并行的实现
+        a = BitParallelLevenshtein()
+    elif algorithm == Algorithm.COSINE:
+        index = CosineIndex(candidates, 3 if k is None else k)
+        for i, query in enumerate(queries):
+            matrix[i] = 1.0 - index.scores(query)
+        return matrix
+    elif algorithm == Algorithm.JARO_WINKLE:
+        a = JaroWinkler()
+        for i, query in enumerate(queries):
+            matrix[i] = [1.0 - score for score in a.similarity_many(query, candidates)]
+        return matrix
+    else:
+        a = Factory.get_algorithm(algorithm, k)
+
+    if isinstance(a, ShingleBased) and a.cache is None:
+        # 每个候选串在本进程里只切分一次，调用方传入的对象不改动
+        a = copy.copy(a)
+        a.cache = ProfileCache(len(queries) + len(candidates))
+    for i, query in enumerate(queries):
+        for j, candidate in enumerate(candidates):
+            matrix[i, j] = a.distance(query, candidate)
+    return matrix
 #
 # def read_text(text):
 #     with open(text,"r") as f:
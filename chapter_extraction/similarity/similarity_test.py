@@ -0,0 +1,72 @@
+# Copyright (c) 2018 luozhouyang
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import unittest
+
+from .qgram import QGram
+from .similarity import Algorithm, Factory
+
+
+class TestFactory(unittest.TestCase):
+
+    def test_distance_matrix(self):
+        queries = ["资产管理计划财产的估值", "委托财产的估值", "第一章 总则"]
+        candidates = ["资产管理计划财产的投资", "财产的估值", "第一章 总则", "上海市"]
+        for algorithm in [Algorithm.LEVENSHTEIN, Algorithm.COSINE, Algorithm.JARO_WINKLE, Algorithm.Q_GRAM,
+                          Algorithm.DAMERAU, Algorithm.METRIC_LCS]:
+            a = Factory.get_algorithm(algorithm, 2)
+            matrix = Factory.distance_matrix(queries, candidates, algorithm, k=2)
+            self.assertEqual(matrix.shape, (len(queries), len(candidates)))
+            for i, s0 in enumerate(queries):
+                for j, s1 in enumerate(candidates):
+                    self.assertAlmostEqual(matrix[i, j], a.distance(s0, s1))
+            parallel = Factory.distance_matrix(queries, candidates, algorithm, n_jobs=2, k=2)
+            self.assertTrue((abs(parallel - matrix) < 1e-9).all())
+
+    def test_top_k(self):
+        candidates = ["资产管理计划财产的投资", "财产的估值", "第一章 总则", "委托财产的估值"]
+        self.assertEqual(Factory.top_k("委托财产的估值", candidates, 2), [(3, 0), (1, 2)])
+        self.assertEqual(Factory.top_k("委托财产的估值", candidates, 2, n_jobs=2), [(3, 0), (1, 2)])
+        for algorithm in [Algorithm.Q_GRAM, Algorithm.N_GRAM, Algorithm.JACCARD, QGram(2)]:
+            for shingle_k in [1, 2, 4]:
+                expected = Factory.top_k("委托财产的估值", candidates, 3, algorithm, shingle_k=shingle_k)
+                self.assertEqual(Factory.top_k("委托财产的估值", candidates, 3, algorithm, 2, shingle_k), expected)
+
+    def test_get_algorithm_k(self):
+        self.assertEqual(Factory.get_algorithm(Algorithm.Q_GRAM, 2).get_k(), 2)
+        self.assertEqual(Factory.get_algorithm(Algorithm.N_GRAM, 4).n, 4)
+        # 不传 k 时用各个类自己的默认值
+        self.assertEqual(Factory.get_algorithm(Algorithm.N_GRAM).n, 2)
+        self.assertEqual(Factory.get_algorithm(Algorithm.Q_GRAM).get_k(), 3)
+        self.assertEqual(Factory.get_algorithm(Algorithm.COSINE).get_k(), 3)
+        self.assertNotEqual(Factory.get_algorithm(Algorithm.Q_GRAM, 1).distance("财产的估值", "估值的财产"),
+                            Factory.get_algorithm(Algorithm.Q_GRAM, 2).distance("财产的估值", "估值的财产"))
+
+    def test_algorithm_not_changed(self):
+        a = QGram(2)
+        matrix = Factory.distance_matrix(["委托财产的估值"], ["财产的估值", "第一章 总则"], a)
+        self.assertIsNone(a.cache)
+        self.assertEqual(matrix[0].tolist(), [a.distance("委托财产的估值", "财产的估值"),
+                                              a.distance("委托财产的估值", "第一章 总则")])
+
+
+if __name__ == "__main__":
+    unittest.main()
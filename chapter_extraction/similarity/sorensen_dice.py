@@ -18,15 +18,15 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .shingle_based import ShingleBased
+from .shingle_based import CompactProfile, ShingleBased
 from .string_distance import NormalizedStringDistance
 from .string_similarity import NormalizedStringSimilarity
 
 
 class SorensenDice(ShingleBased, NormalizedStringDistance, NormalizedStringSimilarity):
 
-    def __init__(self, k=3):
-        super().__init__(k)
+    def __init__(self, k=3, cache=None, compact=False):
+        super().__init__(k, cache, compact)
 
     def distance(self, s0, s1):
         return 1.0 - self.similarity(s0, s1)
@@ -38,8 +38,13 @@ class SorensenDice(ShingleBased, NormalizedStringDistance, NormalizedStringSimil
             raise TypeError("Argument s1 is NoneType.")
         if s0 == s1:
             return 1.0
+        return self.similarity_profiles(self.profile(s0), self.profile(s1))
+
+    def similarity_profiles(self, profile0, profile1):
+        if isinstance(profile0, CompactProfile):
+            inter = len(profile0.intersect(profile1)[0])
+            return 2.0 * inter / (len(profile0) + len(profile1))
         union = set()
-        profile0, profile1 = self.get_profile(s0), self.get_profile(s1)
         for k in profile0.keys():
             union.add(k)
         for k in profile1.keys():
@@ -49,3 +54,6 @@ class SorensenDice(ShingleBased, NormalizedStringDistance, NormalizedStringSimil
             if k in profile0.keys() and k in profile1.keys():
                 inter += 1
         return 2.0 * inter / (len(profile0) + len(profile1))
+
+    def distance_profiles(self, profile0, profile1):
+        return 1.0 - self.similarity_profiles(profile0, profile1)
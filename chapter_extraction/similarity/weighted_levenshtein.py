@@ -18,6 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import numpy as np
+
 from .string_distance import StringDistance
 
 
@@ -36,13 +38,99 @@ class CharacterSubstitutionInterface:
         raise NotImplementedError()
 
 
+class CostTable:
+    """
+    The substitution, insertion and deletion costs of the characters seen so far, kept as numpy
+    arrays indexed by character code. Insertion and deletion costs are asked once per character;
+    a substitution cost is asked only the first time a comparison needs that pair. The arrays grow
+    geometrically, so one table serves a whole batch.
+    """
+
+    def __init__(self, character_substitution, character_ins_del=None, alphabet=""):
+        self.character_substitution = character_substitution
+        self.character_ins_del = character_ins_del
+        self.index = dict()
+        self.chars = []
+        self.substitution = np.zeros((0, 0))
+        self.known = np.zeros((0, 0), dtype=bool)
+        self.insertion = np.zeros(0)
+        self.deletion = np.zeros(0)
+        self.extend(alphabet)
+
+    def __len__(self):
+        return len(self.chars)
+
+    def extend(self, chars):
+        new = [c for c in dict.fromkeys(chars) if c not in self.index]
+        if not new:
+            return
+        old_size = len(self.chars)
+        for c in new:
+            self.index[c] = len(self.chars)
+            self.chars.append(c)
+        size = len(self.chars)
+        if size > len(self.insertion):
+            self._grow(max(size, 2 * len(self.insertion), 16))
+
+        if self.character_ins_del is None:
+            self.insertion[old_size:size] = 1.0
+            self.deletion[old_size:size] = 1.0
+        else:
+            self.insertion[old_size:size] = [self.character_ins_del.insertion_cost(c) for c in new]
+            self.deletion[old_size:size] = [self.character_ins_del.deletion_cost(c) for c in new]
+
+    def _grow(self, capacity):
+        size = len(self.substitution)
+        substitution = np.zeros((capacity, capacity))
+        substitution[:size, :size] = self.substitution
+        known = np.zeros((capacity, capacity), dtype=bool)
+        known[:size, :size] = self.known
+        # 相同字符替换代价为 0
+        np.fill_diagonal(known, True)
+        self.substitution, self.known = substitution, known
+        self.insertion = np.concatenate([self.insertion, np.zeros(capacity - size)])
+        self.deletion = np.concatenate([self.deletion, np.zeros(capacity - size)])
+
+    def encode(self, s):
+        self.extend(s)
+        return np.fromiter((self.index[c] for c in s), dtype=np.intp, count=len(s))
+
+    def fill(self, a, b):
+        """
+        To make sure substitution[a[i], b[j]] holds the cost of every pair of the encoded strings a and b
+        """
+        rows, cols = np.unique(a), np.unique(b)
+        block = np.ix_(rows, cols)
+        i, j = np.nonzero(~self.known[block])
+        if len(i) == 0:
+            return
+        c0, c1 = rows[i], cols[j]
+        cost = self.character_substitution.cost
+        chars = self.chars
+        self.substitution[c0, c1] = [cost(chars[x], chars[y]) for x, y in zip(c0.tolist(), c1.tolist())]
+        self.known[c0, c1] = True
+
+
 class WeightedLevenshtein(StringDistance):
 
-    def __init__(self, character_substitution, character_ins_del=None):
+    def __init__(self, character_substitution, character_ins_del=None, compiled=False):
         self.character_ins_del = character_ins_del
         if character_substitution is None:
             raise TypeError("Argument character_substitution is NoneType.")
         self.character_substitution = character_substitution
+        self.cost_table = None
+        if compiled:
+            self.compile()
+
+    def compile(self, alphabet=""):
+        """
+        Look the costs up in a CostTable instead of calling the interfaces for every DP cell,
+        and fill each DP row with a few numpy operations
+        :param alphabet: str, characters to put in the table up front, others are added when first seen
+        :return: CostTable
+        """
+        self.cost_table = CostTable(self.character_substitution, self.character_ins_del, alphabet)
+        return self.cost_table
 
     def distance(self, s0, s1):
         if s0 is None:
@@ -55,6 +143,8 @@ class WeightedLevenshtein(StringDistance):
             return len(s1)
         if len(s1) == 0:
             return len(s0)
+        if self.cost_table is not None:
+            return self._compiled_distance(s0, s1)
 
         v0, v1 = [0.0] * (len(s1) + 1), [0.0] * (len(s1) + 1)
 
@@ -78,6 +168,79 @@ class WeightedLevenshtein(StringDistance):
 
         return v0[len(s1)]
 
+    def _compiled_distance(self, s0, s1):
+        table = self.cost_table
+        a, b = table.encode(s0), table.encode(s1)
+        table.fill(a, b)
+        deletion = table.deletion[a]
+        # 插入代价的前缀和 C：v1[j] = min(t[l] + C[j] - C[l], l <= j)
+        # 其中 t 是只走替换和删除得到的值，于是 v1 = C + minimum.accumulate(t - C)
+        inserted = np.zeros(len(b) + 1)
+        np.cumsum(table.insertion[b], out=inserted[1:])
+        v0 = inserted.copy()
+        t = np.empty(len(b) + 1)
+        for i in range(len(a)):
+            t[0] = v0[0] + deletion[i]
+            np.minimum(v0[1:] + deletion[i], v0[:-1] + table.substitution[a[i], b], out=t[1:])
+            v0 = inserted + np.minimum.accumulate(t - inserted)
+        return float(v0[-1])
+
+    def distance_within(self, s0, s1, k):
+        """
+        Weighted distance if it is at most k, else None. The scan stops as soon as a whole row
+        costs more than k; with unit insertion and deletion costs only the diagonal band of
+        width 2k+1 is filled.
+        """
+        if s0 is None:
+            raise TypeError("Argument s0 is NoneType.")
+        if s1 is None:
+            raise TypeError("Argument s1 is NoneType.")
+        if s0 == s1:
+            return 0.0
+        if len(s0) == 0 or len(s1) == 0:
+            d = self.distance(s0, s1)
+            return d if d <= k else None
+
+        n, m = len(s0), len(s1)
+        inf = float("inf")
+        # 插入删除代价都为 1 时，|i - j| 超过 k 的格子不可能不超过 k
+        band = max(n, m)
+        if self.character_ins_del is None:
+            if abs(n - m) > k:
+                return None
+            band = int(k)
+
+        v0, v1 = [inf] * (m + 1), [inf] * (m + 1)
+        v0[0] = 0
+        for j in range(1, min(m, band) + 1):
+            v0[j] = v0[j - 1] + self._insertion_cost(s1[j - 1])
+
+        for i in range(n):
+            s1i = s0[i]
+            deletion_cost = self._deletion_cost(s1i)
+            lo, hi = max(0, i + 1 - band), min(m, i + 1 + band)
+            if lo == 0:
+                v1[0] = v0[0] + deletion_cost
+            else:
+                v1[lo - 1] = inf
+            row_min = v1[lo]
+
+            for j in range(max(lo, 1) - 1, hi):
+                s2j = s1[j]
+                cost = 0
+                if s1i != s2j:
+                    cost = self.character_substitution.cost(s1i, s2j)
+                insertion_cost = self._insertion_cost(s2j)
+                v = min(v1[j] + insertion_cost, v0[j + 1] + deletion_cost, v0[j] + cost)
+                v1[j + 1] = v
+                if v < row_min:
+                    row_min = v
+            if row_min > k:
+                return None
+            v0, v1 = v1, v0
+
+        return v0[m] if v0[m] <= k else None
+
     def _insertion_cost(self, c):
         if self.character_ins_del is None:
             return 1.0
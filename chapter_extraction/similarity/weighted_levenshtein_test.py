@@ -29,6 +29,16 @@ class CharSub(CharacterSubstitutionInterface):
         return 1.0
 
 
+class CountingSub(CharacterSubstitutionInterface):
+
+    def __init__(self):
+        self.pairs = []
+
+    def cost(self, c0, c1):
+        self.pairs.append((c0, c1))
+        return 0.5 if c0 in "资产估值" and c1 in "资产估值" else 1.5
+
+
 class TestWeightedLevenshtein(unittest.TestCase):
 
     def test_weighted_levenshtein(self):
@@ -45,6 +55,44 @@ class TestWeightedLevenshtein(unittest.TestCase):
         print(distance_format.format(str(a.distance(s1, s3)), s1, s3))
         print(distance_format.format(str(a.distance(s2, s3)), s2, s3))
 
+    def test_distance_within(self):
+        a = WeightedLevenshtein(character_substitution=CharSub())
+        strings = ["", "上海", "上海市", "海上市", "资产管理计划财产的估值", "资产管理计划财产的投资", "第一章 总则"]
+        for s0 in strings:
+            for s1 in strings:
+                d = a.distance(s0, s1)
+                for k in range(5):
+                    self.assertEqual(a.distance_within(s0, s1, k), d if d <= k else None)
+
+    def test_compiled(self):
+        a = WeightedLevenshtein(character_substitution=CharSub())
+        b = WeightedLevenshtein(character_substitution=CharSub(), compiled=True)
+        strings = ["", "上海", "上海市", "海上市", "资产管理计划财产的估值", "资产管理计划财产的投资", "第一章 总则"]
+        for s0 in strings:
+            for s1 in strings:
+                self.assertEqual(a.distance(s0, s1), b.distance(s0, s1))
+        self.assertEqual(len(b.cost_table), len(set("".join(strings))))
+
+    def test_compiled_lazy_costs(self):
+        a = WeightedLevenshtein(character_substitution=CountingSub())
+        sub = CountingSub()
+        b = WeightedLevenshtein(character_substitution=sub, compiled=True)
+        s0, s1, s2 = "资产管理计划财产的估值", "委托财产的估值", "第一章 总则"
+        self.assertEqual(a.distance(s0, s1), b.distance(s0, s1))
+        # 只问这一对字符串用到的字符对，每对只问一次
+        expected = set((c0, c1) for c0 in s0 for c1 in s1 if c0 != c1)
+        self.assertEqual(sorted(sub.pairs), sorted(expected))
+        self.assertEqual(a.distance(s1, s0), b.distance(s1, s0))
+        self.assertEqual(a.distance(s0, s1), b.distance(s0, s1))
+        self.assertEqual(a.distance(s0, s2), b.distance(s0, s2))
+        expected.update((c0, c1) for c0 in s1 for c1 in s0 if c0 != c1)
+        expected.update((c0, c1) for c0 in s0 for c1 in s2 if c0 != c1)
+        self.assertEqual(sorted(sub.pairs), sorted(expected))
+        # 容量按倍数增长
+        b.cost_table.extend("".join(chr(0x4e00 + i) for i in range(100)))
+        self.assertGreaterEqual(len(b.cost_table.insertion), len(b.cost_table))
+        self.assertEqual(a.distance(s2, s0 + "一丁"), b.distance(s2, s0 + "一丁"))
+
 
 if __name__ == "__main__":
     unittest.main()
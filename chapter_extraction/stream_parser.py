@@ -0,0 +1,116 @@
+# Streaming html ingestion, keeps only the elements the chapter stages look at
+from lxml import etree
+
+CHUNK_SIZE = 1 << 20
+# 和 bs4 的 get_text() 一样，不取 script/style 里的内容
+SKIPPED_TEXT = ("script", "style")
+
+
+class StreamElement:
+    """
+    Wrapper giving an lxml element the part of the bs4 Tag interface used by utils and main
+    """
+
+    def __init__(self, element):
+        self.element = element
+
+    @property
+    def name(self):
+        return self.element.tag
+
+    @property
+    def attrs(self):
+        return self.element.attrib
+
+    def __getitem__(self, key):
+        return self.element.attrib[key]
+
+    def __setitem__(self, key, value):
+        self.element.attrib[key] = value
+
+    def __delitem__(self, key):
+        self.element.attrib.pop(key, None)
+
+    def get(self, key, default=None):
+        return self.element.attrib.get(key, default)
+
+    def get_text(self):
+        parts = []
+        _collect_text(self.element, parts)
+        return "".join(parts)
+
+    def find_all(self):
+        return [StreamElement(e) for e in self.element.iterdescendants() if isinstance(e.tag, str)]
+
+    def __str__(self):
+        return etree.tostring(self.element, method="html", encoding="unicode", with_tail=False)
+
+
+def _collect_text(element, parts):
+    """text of element and its descendants without script/style bodies, their tails are kept"""
+    if element.text and isinstance(element.tag, str):
+        parts.append(element.text)
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in SKIPPED_TEXT:
+            _collect_text(child, parts)
+        if child.tail:
+            parts.append(child.tail)
+
+
+class StreamDocument:
+    """
+    What is left of the document after streaming: the outermost kept elements in order
+    """
+
+    def __init__(self, elements):
+        self.elements = elements
+
+    def __str__(self):
+        return "<html><body>" + "".join(str(p) for p in self.elements) + "</body></html>"
+
+
+def stream_paragraphs(file_path, tags):
+    """
+    To parse an html file incrementally, keeping only elements whose name is in tags
+    :param file_path: str, html file path
+    :param tags: list, element names to keep, e.g. ['img', 'table', 'p']
+    :return: tuple, (list of StreamElement in document order, StreamDocument)
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    elements = []
+    outermost = []
+    kept_depth = 0
+
+    def handle(events):
+        nonlocal kept_depth
+        for event, element in events:
+            if not isinstance(element.tag, str):
+                continue
+            kept = element.tag in tags
+            if event == "start":
+                if kept:
+                    elements.append(StreamElement(element))
+                    if kept_depth == 0:
+                        outermost.append(elements[-1])
+                    kept_depth += 1
+                continue
+
+            if kept:
+                kept_depth -= 1
+            if kept_depth == 0:
+                # nothing above this element is kept, so detach it and let the parser forget it
+                parent = element.getparent()
+                if parent is not None:
+                    parent.remove(element)
+
+    with open(file_path, "r") as temp:
+        while True:
+            chunk = temp.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            handle(parser.read_events())
+        parser.close()
+        handle(parser.read_events())
+        temp.close()
+    return elements, StreamDocument(outermost)
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from .utils import ParagraphIndex, get_soup_dictionary, htmlTosoup, match_soup
+
+WELL_FORMED = """<html><head><meta charset="utf-8"></head><body>
+<p>封面 资产管理合同</p><p>目录</p>
+<p>第一节 总则 ........ 3</p><p>第二节 释义 ........ 4</p><p>第三节 资产管理计划财产的估值 ........ 5</p>
+<p></p><p>正文</p>
+<p>第一节 总则</p><p>本节说明总则。</p>
+<table><tr><td><p>表格内容</p></td></tr></table>
+<p>第二节 释义</p><p>释义内容<img src="a.png"/></p>
+<p>第三节 资产管理计划财产的估值</p><p>估值内容</p>
+<p>前<script>var 中="文";</script>后<style>p { content: "样式"; }</style>尾<!-- 注释 --></p>
+</body></html>
+"""
+
+# 未闭合的 p、交错的 b/p、缺 tr/td 结束标签的表格、多余的 </p>
+MALFORMED = """<html><head><meta charset="utf-8"></head><body>
+<p>封面 资产管理合同
+<p>目录
+<p>第一节 总则 ........ 3
+<p>第二节 释义 ........ 4
+<p>第三节 资产管理计划财产的估值 ........ 5
+<p></p><p>正文
+<p>第一节 总则
+<p>本节说明总则。<b>粗体<p>嵌套段落</b>
+<table><tr><td><p>表格内容<td>第二格</table>
+<p>第二节 释义</p></p>
+<div><p>释义内容<img src="a.png"></div>
+<p>第三节 资产管理计划财产的估值
+<p>估值内容 &nbsp; &amp; <br>换行
+<p>前<script>var 中="文";</script>后<style>p { content: "样式"; }
+</body></html>
+"""
+
+
+def boundaries(para):
+    file_dictionary, para_id = get_soup_dictionary(para, 3)
+    return match_soup(para_id, file_dictionary, para)
+
+
+class TestStreamParser(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def check_same_as_soup(self, html, features="lxml"):
+        path = os.path.join(self.dir.name, "a.html")
+        with open(path, "w") as temp:
+            temp.write(html)
+        soup = ParagraphIndex.from_soup(htmlTosoup(path, features), "Chinese")
+        stream = ParagraphIndex.from_stream(path, "Chinese")
+        self.assertEqual([p.name for p in soup], [p.name for p in stream])
+        self.assertEqual([soup.text(i) for i in range(len(soup))], [stream.text(i) for i in range(len(stream))])
+        self.assertEqual(boundaries(soup), boundaries(stream))
+        return boundaries(stream)
+
+    def test_well_formed(self):
+        dic, li = self.check_same_as_soup(WELL_FORMED)
+        self.assertEqual(dic, ["总则", "释义", "资产管理计划财产的估值"])
+        # 转换得到的 html 默认用 html.parser，规整的 html 上结果一样
+        self.assertEqual(self.check_same_as_soup(WELL_FORMED, "html.parser"), (dic, li))
+
+    def test_script_style(self):
+        path = os.path.join(self.dir.name, "a.html")
+        with open(path, "w") as temp:
+            temp.write(WELL_FORMED)
+        stream = ParagraphIndex.from_stream(path, "Chinese")
+        self.assertEqual(stream.tokens(len(stream) - 1), "前后尾")
+
+    def test_malformed(self):
+        # 不规整的 html 只有 lxml 和 stream 保证一致
+        dic, li = self.check_same_as_soup(MALFORMED)
+        self.assertEqual(dic, ["总则", "释义", "资产管理计划财产的估值"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# Matching body paragraphs against the menu titles of one document
+from similarity.weighted_levenshtein import WeightedLevenshtein
+from similarity.weighted_levenshtein_test import CharSub
+from tokenizer import normalize_title, split_titles
+
+END_PUNCTUATION = [";", "；", "。", "\"", "”"]
+EXCLUDED_PREFIXES = ["本", "的"]
+
+
+class SuffixTrie:
+    """
+    Trie over reversed titles: walking a paragraph backwards from its last character visits every
+    title that is a suffix of it, in one pass no matter how many titles there are
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, key, value):
+        node = self.root
+        for char in reversed(key):
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(value)
+
+    def remove(self, key, value):
+        node = self.root
+        for char in reversed(key):
+            node = node[char]
+        node[None].remove(value)
+
+    def suffixes(self, sentence):
+        """yield the values of every title that ends sentence, unless 本 or 的 comes right before it"""
+        node = self.root
+        for j in range(len(sentence) - 1, -1, -1):
+            node = node.get(sentence[j])
+            if node is None:
+                return
+            if node.get(None) and (j == 0 or sentence[j - 1] not in EXCLUDED_PREFIXES):
+                yield from node[None]
+
+
+class TocMatcher:
+    """
+    The menu titles of a document, normalized once, bucketed by key length and put in a SuffixTrie.
+    A paragraph only checks titles whose key is one of its suffixes or within 2 characters of its
+    own length, in menu order, and the first title that matches is taken out of the menu.
+    """
+
+    def __init__(self, file_dictionary):
+        self.titles = list(file_dictionary)
+        self.keys = [normalize_title(title, True) for title in self.titles]
+        self.alive = [True] * len(self.titles)
+        self.count = len(self.titles)
+        self.distance = WeightedLevenshtein(character_substitution=CharSub())
+
+        # 归一化后长度不变的标题按长度和内容建索引，其余（很少）每段都按原逻辑逐个检查
+        self.buckets = {}
+        self.suffixes = SuffixTrie()
+        self.irregular = []
+        self.indexed = set()
+        for i, title in enumerate(self.titles):
+            key, key_length = self.keys[i]
+            if key_length == len(title) and key_length > 0:
+                self.buckets.setdefault(key_length, []).append(i)
+                self.suffixes.add(key, i)
+                self.indexed.add(i)
+            else:
+                self.irregular.append(i)
+
+    def __len__(self):
+        return self.count
+
+    def remaining(self):
+        return [title for i, title in enumerate(self.titles) if self.alive[i]]
+
+    def candidates(self, sentence, new_text_length):
+        found = set(i for i in self.irregular if self.alive[i])
+        for length in range(new_text_length - 2, new_text_length + 3):
+            found.update(i for i in self.buckets.get(length, []) if self.alive[i])
+        found.update(self.suffixes.suffixes(sentence))
+        return sorted(found)
+
+    def check(self, i, original_sentence, sentence, new_text, new_text_length):
+        title = self.titles[i]
+        tmp, tmp_length = self.keys[i]
+        length = - int(len(title))
+
+        if tmp == sentence[length:] and "本" + tmp != sentence[length - 1:] and "的" + tmp != sentence[length - 1:]:
+            last_char = original_sentence.strip()[-1]
+            return last_char not in END_PUNCTUATION
+        elif abs(new_text_length - tmp_length) >= 3:
+            return False
+        return self.distance.distance_within(sentence, tmp, 1) is not None or \
+            self.distance.distance_within(new_text, tmp, 1) is not None
+
+    def match(self, original_sentence, sentence):
+        """
+        To find the menu title a paragraph starts, and take it out of the menu
+        :param original_sentence: str, paragraph text
+        :param sentence: str, tokenized paragraph text
+        :return: str, the matched title, None when nothing matches
+        """
+        new_text = "".join(key for key, _ in split_titles(sentence))
+        new_text_length = len(new_text)
+        for i in self.candidates(sentence, new_text_length):
+            if self.check(i, original_sentence, sentence, new_text, new_text_length):
+                self.alive[i] = False
+                self.count -= 1
+                if i in self.indexed:
+                    self.suffixes.remove(self.keys[i][0], i)
+                return self.titles[i]
+        return None
@@ -0,0 +1,117 @@
+import random
+import unittest
+
+from similarity.weighted_levenshtein import WeightedLevenshtein
+from similarity.weighted_levenshtein_test import CharSub
+from .toc_matcher import SuffixTrie, TocMatcher
+from .tokenizer import normalize_title, split_titles
+
+
+def reference_match(file_dictionary, original_sentence, sentence):
+    """the linear menu scan TocMatcher replaced, file_dictionary loses the matched title"""
+    a = WeightedLevenshtein(character_substitution=CharSub())
+    new_text = "".join(key for key, _ in split_titles(sentence))
+    new_text_length = len(new_text)
+    for title in list(file_dictionary):
+        length = - int(len(title))
+        tmp, tmp_length = normalize_title(title, True)
+        if tmp == sentence[length:] and "本" + tmp != sentence[length - 1:] and "的" + tmp != sentence[length - 1:]:
+            if original_sentence.strip()[-1] not in [";", "；", "。", "\"", "”"]:
+                file_dictionary.remove(title)
+                return title
+        elif abs(new_text_length - tmp_length) >= 3:
+            continue
+        elif a.distance(sentence, tmp) <= 1 or a.distance(new_text, tmp) <= 1:
+            file_dictionary.remove(title)
+            return title
+    return None
+
+
+class TestSuffixTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = SuffixTrie()
+        for value, key in enumerate(["总则", "则", "本则", "估值", "总则"]):
+            self.trie.add(key, value)
+
+    def test_suffixes(self):
+        # 由短到长，同一标题按加入顺序
+        self.assertEqual(list(self.trie.suffixes("第一节总则")), [1, 0, 4])
+        self.assertEqual(list(self.trie.suffixes("资产估值")), [3])
+        self.assertEqual(list(self.trie.suffixes("总则说明")), [])
+        self.assertEqual(list(self.trie.suffixes("")), [])
+
+    def test_excluded_prefixes(self):
+        # “本总则”“的总则”不算以“总则”结尾，但“则”前面是“总”照样算
+        self.assertEqual(list(self.trie.suffixes("本总则")), [1])
+        self.assertEqual(list(self.trie.suffixes("计划的总则")), [1])
+        # 标题就是整句 (j == 0) 时前面没有字，不受排除规则影响
+        self.assertEqual(list(self.trie.suffixes("总则")), [1, 0, 4])
+        self.assertEqual(list(self.trie.suffixes("本则")), [2])
+        self.assertEqual(list(self.trie.suffixes("的本则")), [])
+
+    def test_remove(self):
+        self.trie.remove("总则", 0)
+        self.assertEqual(list(self.trie.suffixes("第一节总则")), [1, 4])
+        self.trie.remove("总则", 4)
+        self.trie.remove("则", 1)
+        self.assertEqual(list(self.trie.suffixes("第一节总则")), [])
+        self.assertEqual(list(self.trie.suffixes("本则")), [2])
+        with self.assertRaises(ValueError):
+            self.trie.remove("总则", 0)
+
+
+class TestTocMatcher(unittest.TestCase):
+
+    def assertMatches(self, titles, paragraphs, expected):
+        matcher = TocMatcher(titles)
+        reference = list(titles)
+        result = [matcher.match(original, sentence) for original, sentence in paragraphs]
+        self.assertEqual(result, expected)
+        self.assertEqual(result, [reference_match(reference, original, sentence) for original, sentence in paragraphs])
+        self.assertEqual(matcher.remaining(), reference)
+        self.assertEqual(len(matcher), len(reference))
+
+    def test_first_match_wins(self):
+        # 两个标题都只差一个字，取目录里靠前的那个，并把它移出目录
+        self.assertMatches(["会计核算", "会计核销"], [("会计核对", "会计核对"), ("会计核对", "会计核对")],
+                           ["会计核算", "会计核销"])
+        self.assertMatches(["会计核销", "会计核算"], [("会计核对", "会计核对")], ["会计核销"])
+
+    def test_suffix_match(self):
+        self.assertMatches(["总则", "释义"], [("第一节 释义", "第一节释义"), ("资产管理计划之总则", "资产管理计划之总则")],
+                           ["释义", "总则"])
+
+    def test_excluded_prefixes(self):
+        self.assertMatches(["总则"], [("适用于本计划的总则", "适用于本计划的总则"), ("适用于本计划本总则", "适用于本计划本总则")],
+                           [None, None])
+
+    def test_end_punctuation(self):
+        for end in [";", "；", "。", "\"", "”"]:
+            self.assertMatches(["总则"], [("第一节 总则" + end, "第一节总则")], [None])
+        self.assertMatches(["总则"], [("第一节 总则 1", "第一节总则")], ["总则"])
+
+    def test_irregular_titles(self):
+        # 归一化后变短的标题不进索引，每段都逐个检查
+        self.assertMatches(["第一节 总则", "第二节 释义"], [("释义", "释义"), ("第一节 总则", "第一节总则")],
+                           ["第二节 释义", "第一节 总则"])
+        self.assertMatches(["", "第一部分"], [("正文", "正文")], [None])
+
+    def test_random_menus(self):
+        rng = random.Random(0)
+        chars = "总则会计核算本的部分节第一二甲乙"
+        for _ in range(300):
+            titles = ["".join(rng.choice(chars) for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 8))]
+            paragraphs = []
+            for _ in range(10):
+                sentence = "".join(rng.choice(chars) for _ in range(rng.randint(1, 7)))
+                paragraphs.append((sentence + rng.choice(["", "。", "x", " 1"]), sentence))
+            matcher = TocMatcher(titles)
+            reference = list(titles)
+            for original, sentence in paragraphs:
+                self.assertEqual(matcher.match(original, sentence), reference_match(reference, original, sentence))
+                self.assertEqual(matcher.remaining(), reference)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# Paragraph tokenizers, keep only the characters of one language
+import html
+import re
+from functools import lru_cache
+
+# 每种语言保留的字符类，模块加载时编译一次
+LANGUAGE_CHARS = {
+    "Chinese": "\u4e00-\u9fa5",
+    "English": "a-zA-Z",
+}
+_DROP = {language: re.compile("[^" + chars + "]+") for language, chars in LANGUAGE_CHARS.items()}
+_TAG = re.compile(r"</?[A-Za-z!][^>]*(?:>|$)")
+# script/style 的内容不是正文，BeautifulSoup.getText() 也不返回它们
+_RAW_TEXT = re.compile(r"<(script|style)\b[^>]*>.*?(?:</\1\s*>|\Z)", re.S | re.I)
+_TITLE_WORDS = str.maketrans("", "", "和与或的")
+
+CACHE_SIZE = 1 << 16
+
+
+def strip_tags(text):
+    """drop markup, script/style bodies and decode entities, the text BeautifulSoup(text).getText() gives for paragraph fragments"""
+    return html.unescape(_TAG.sub("", _RAW_TEXT.sub("", text)))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def content_tokenizer(text, language):
+    if language not in _DROP:
+        raise ValueError("Sorry, The template doesn't support " + str(language) + " currently.")
+    text = str(text)
+    if "<p>" in text or "<line>" in text:
+        text = strip_tags(text)
+    return _DROP[language].sub("", text)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def title_tokenizer(text, language):
+    return content_tokenizer(text, language).translate(_TITLE_WORDS)
+
+
+# 标题归一化：去掉“X部分”“X节”、空白和中文数字
+_PART = re.compile(".部分|..部分|...部分")
+_SECTION = re.compile(".节|..节|...节")
+_SPACE_NUMERAL = re.compile(r"[\s十一二三四五六七八九]+")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_title(text, drop_di=False):
+    """
+    To strip a title down to the key used for menu matching, with 第 removed too when drop_di
+    :return: tuple, (key, len(key))
+    """
+    # “部分”和“节”的去除不能合并成一个正则：先去“部分”可能让新的“X节”相邻，合并后结果会不同
+    key = _PART.sub("", text)
+    if drop_di:
+        key = key.replace("第", "")
+    key = _SPACE_NUMERAL.sub("", _SECTION.sub("", key))
+    return key, len(key)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_titles(text):
+    """return the normalized (key, length) of every 第-led title in text, or of the whole text without 第"""
+    if "第" in text:
+        return tuple(normalize_title(i) for i in text.split("第")[1:])
+    return normalize_title(text),
@@ -0,0 +1,87 @@
+# Micro-benchmark of tokenizer against the per-call regex/BeautifulSoup tokenizers it replaced
+# python tokenizer_benchmark.py --fileDir /Users/ruiliu/Desktop/test --language Chinese --limit 100000
+
+import argparse
+import os
+import re
+import time
+import warnings
+
+from bs4 import BeautifulSoup
+
+import tokenizer
+from utils import filesToIndex
+
+
+def legacy_content_tokenizer(text, language):
+    if language == "Chinese":
+        if "<p>" in text or "<line>" in text:
+            inner_text = BeautifulSoup(text).getText()
+            result = re.findall(r'[\u4e00-\u9fa5]', str(inner_text))
+        else:
+            result = re.findall(r'[\u4e00-\u9fa5]', str(text))
+    if language == "English":
+        if "<p>" in text or "<line>" in text:
+            inner_text = BeautifulSoup(text).getText()
+            result = re.findall(r'[a-z]|[A-Z]', str(inner_text))
+        else:
+            result = re.findall(r'[a-z]|[A-Z]', str(text))
+    result = "".join(result)
+    return result
+
+
+def legacy_title_tokenizer(text, language):
+    result = legacy_content_tokenizer(text, language)
+    for word in ["和", "与", "或", "的"]:
+        result = result.replace(word, "")
+    return result
+
+
+def load_paragraphs(file_dir, language, limit, out_path):
+    paragraphs = []
+    for file in sorted(os.listdir(file_dir)):
+        para = filesToIndex(os.path.join(file_dir, file), out_path, language)
+        paragraphs += [para.text(i) for i in range(len(para))]
+        # 标签片段走 strip_tags 分支
+        paragraphs += [str(p) for p in para if p.name == 'p']
+        if len(paragraphs) >= limit:
+            break
+    if len(paragraphs) == 0:
+        raise ValueError("No paragraphs found in " + file_dir)
+    # 不足 limit 时循环补齐，重复的段落正是缓存命中的情形
+    return [paragraphs[i % len(paragraphs)] for i in range(limit)]
+
+
+def timeit(function, paragraphs, language):
+    start = time.time()
+    result = [function(text, language) for text in paragraphs]
+    return time.time() - start, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fileDir", type=str, help="path to file dir", required=True)
+    parser.add_argument("--language", type=str, help="file langusge", required=False, default="Chinese")
+    parser.add_argument("--limit", type=int, help="number of paragraphs", required=False, default=100000)
+    parser.add_argument("--out_path", type=str, help="path to conversion output dir", required=False,
+                        default="/tmp/tokenizer_benchmark")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    paragraphs = load_paragraphs(args.fileDir, args.language, args.limit, args.out_path)
+    print("[INFO] %d paragraphs, %d distinct" % (len(paragraphs), len(set(paragraphs))))
+    for name, legacy, current in [("content_tokenizer", legacy_content_tokenizer, tokenizer.content_tokenizer),
+                                  ("title_tokenizer", legacy_title_tokenizer, tokenizer.title_tokenizer)]:
+        legacy_seconds, expected = timeit(legacy, paragraphs, args.language)
+        tokenizer.content_tokenizer.cache_clear()
+        tokenizer.title_tokenizer.cache_clear()
+        uncached_seconds, _ = timeit(current.__wrapped__, paragraphs, args.language)
+        cold_seconds, result = timeit(current, paragraphs, args.language)
+        warm_seconds, _ = timeit(current, paragraphs, args.language)
+        if result != expected:
+            mismatches = sum(1 for a, b in zip(result, expected) if a != b)
+            print("[ERROR] %s differs from the legacy tokenizer on %d paragraphs" % (name, mismatches))
+        print("[INFO] %s legacy %.3fs, no memo %.3fs (x%.1f), cold memo %.3fs (x%.1f), warm memo %.3fs (x%.1f)" % (
+            name, legacy_seconds, uncached_seconds, legacy_seconds / max(uncached_seconds, 1e-9),
+            cold_seconds, legacy_seconds / max(cold_seconds, 1e-9),
+            warm_seconds, legacy_seconds / max(warm_seconds, 1e-9)))
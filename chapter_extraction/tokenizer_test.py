@@ -0,0 +1,44 @@
+import unittest
+
+from bs4 import BeautifulSoup
+
+from .tokenizer import content_tokenizer, normalize_title, split_titles, strip_tags, title_tokenizer
+
+
+class TestTokenizer(unittest.TestCase):
+
+    def test_strip_tags(self):
+        for text in ["<p>甲&amp;乙<br/>丙</p>",
+                     "<p>x<script>var 中='文'</script></p>",
+                     "<p>前<style>p {}</style>后<SCRIPT type=\"x\">中</SCRIPT >尾</p>",
+                     "<p>前<scripts>中</scripts></p>",
+                     "<p>甲<script>中文"]:
+            self.assertEqual(strip_tags(text), BeautifulSoup(text, "lxml").getText())
+
+    def test_content_tokenizer(self):
+        self.assertEqual(content_tokenizer("第一节 总则 1.1", "Chinese"), "第一节总则")
+        self.assertEqual(content_tokenizer("<p>第一节&nbsp;总则</p>", "Chinese"), "第一节总则")
+        # script 里的中文不算正文
+        self.assertEqual(content_tokenizer("<p>x<script>var 中='文'</script></p>", "Chinese"), "")
+        self.assertEqual(content_tokenizer("<p>Chapter 1: <b>Scope</b> 范围</p>", "English"), "ChapterScope")
+        with self.assertRaises(ValueError):
+            content_tokenizer("text", "French")
+
+    def test_title_tokenizer(self):
+        self.assertEqual(title_tokenizer("<p>投资和风险与收益或的</p>", "Chinese"), "投资风险收益")
+
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title("第一部分 总则"), ("总则", 2))
+        self.assertEqual(normalize_title("第十二节 释义"), ("释义", 2))
+        self.assertEqual(normalize_title("第二部分第三节 估值与核算"), ("估值与核算", 5))
+        self.assertEqual(normalize_title("第一条 定义"), ("第条定义", 4))
+        self.assertEqual(normalize_title("第一条 定义", drop_di=True), ("条定义", 3))
+
+    def test_split_titles(self):
+        self.assertEqual(split_titles("第一节 总则 第二节 释义"), (("总则", 2), ("释义", 2)))
+        self.assertEqual(split_titles("第一条 定义"), (("条定义", 3),))
+        self.assertEqual(split_titles("释义"), (("释义", 2),))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,79 @@
 # FC file processing utilities
 import difflib
+import hashlib
+import math
 import ntpath
 import os
-import re
 import unicodedata
+import zipfile
 
 import fitz
 import numpy as np
 
 from bs4 import BeautifulSoup
 
-from similarity.weighted_levenshtein import WeightedLevenshtein
-from similarity.weighted_levenshtein_test import CharSub
+from conversion_cache import get_conversion_cache
+from converter import get_conversion_service
+from docx_reader import docx_paragraphs
+from pdf_reader import pdf_paragraphs
+from stream_parser import stream_paragraphs
+from toc_matcher import TocMatcher
+from tokenizer import content_tokenizer, title_tokenizer, split_titles
+
+
+PARAGRAPH_TAGS = ['img', 'table', 'p']
+
+
+class ParagraphIndex:
+    """
+    Ordered img/table/p elements of one document, built once and shared by every stage,
+    with get_text() and the tokenized text of each element cached on first use
+    """
+
+    def __init__(self, elements, language, document=None):
+        self.elements = elements
+        self.language = language
+        self.document = document
+        self._texts = [None] * len(elements)
+        self._tokens = [None] * len(elements)
+
+    @classmethod
+    def from_soup(cls, soup, language):
+        return cls([p for p in soup.find_all() if p.name in PARAGRAPH_TAGS], language, soup)
+
+    @classmethod
+    def from_stream(cls, file_path, language):
+        elements, document = stream_paragraphs(file_path, PARAGRAPH_TAGS)
+        return cls(elements, language, document)
+
+    @classmethod
+    def from_pdf(cls, file_path, language, page_dicts=None):
+        elements, document = pdf_paragraphs(file_path, page_dicts)
+        return cls(elements, language, document)
+
+    @classmethod
+    def from_docx(cls, file_path, language):
+        elements, document = docx_paragraphs(file_path)
+        return cls(elements, language, document)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __getitem__(self, index):
+        return self.elements[index]
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def text(self, index):
+        if self._texts[index] is None:
+            self._texts[index] = self.elements[index].get_text()
+        return self._texts[index]
+
+    def tokens(self, index):
+        if self._tokens[index] is None:
+            self._tokens[index] = content_tokenizer(self.text(index), self.language)
+        return self._tokens[index]
 
 
 def check_bad_char(char):
@@ -58,88 +120,198 @@ def check_by_iou(box_list, page_box, iou_thresh):
         return False, err  # not a image pdf
 
 
-def detect_pdf_type(pdf_path, max_images=1000):
-    """return True of the pdf is searchable"""
+def collect_pdf_page(doc, idx, page, max_images=1000, page_dicts=None):
+    """
+    To read what image detection needs from one page
+    :return: tuple, (True/False when the page is already decided else None,
+                     list of (kind, x0, y0, x1, y1) with kind 0 text block, 1 image block, 2 image list item,
+                     page box)
+    """
+    page_text = page.getText("")
+    remove_spaces_text = "".join(page_text.split())
+    total_bad_char = sum([check_bad_char(char) for char in remove_spaces_text])
+
+    if len(remove_spaces_text) and float(total_bad_char) / len(remove_spaces_text) > 0.9:
+        return True, [], page.rect
+
+    if len(doc) > 1 and idx == 0:  # skip first page
+        return False, [], page.rect
+
+    if page.rotation != 0:
+        page.setRotation(0)  # fix coordinate inconsistency issue when page.rotation != 0
+
+    page_box = page.rect
+    # get images from text dict
+    page_dict = page.getText("dict")
+    if page_dicts is not None:
+        page_dicts[idx] = page_dict
+    boxes = [(block["type"], *block['bbox']) for block in page_dict['blocks'] if block["type"] in [0, 1]]
+
+    # get images from image list
+    xref = page.getImageList(full=True)
+    if len(xref) > max_images:
+        return True, [], page_box
+    for img in xref:
+        try:
+            box = page.getImageBbox(img)
+        except ValueError:
+            item = list(img)
+            item[-1] = 0
+            box = page.getImageBbox(item)
+        boxes.append((2, *box))
+
+    return None, boxes, page_box
+
+
+def classify_pages(boxes, page_boxes, iou_thresh=0.6):
+    """
+    To decide for every page at once whether images cover it, same rules as check_by_iou per page
+    :param boxes: numpy array, rows of (page position, kind, x0, y0, x1, y1), kind as in collect_pdf_page
+    :param page_boxes: numpy array, rows of page (x0, y0, x1, y1)
+    :return: numpy bool array, True for image pages
+    """
+    page_count = len(page_boxes)
+    page = boxes[:, 0].astype(int)
+    kind = boxes[:, 1]
+    x1, y1, x2, y2 = (boxes[:, i].copy() for i in range(2, 6))
+    px1, py1, px2, py2 = (page_boxes[page, i] for i in range(4))
+
+    # 与 check_by_iou 一致：先过滤非法坐标，再裁剪到页面内
+    legal = np.logical_not((x1 > px2) | (y1 > py2) | (x2 <= x1) | (y2 <= y1))
+    raw_area = (x2 - x1) * (y2 - y1)
+    for coord in (x1, y1, x2, y2):
+        coord[coord < 0] = 0
+    x2 = np.where(x2 >= px2, px2 - 1, x2)
+    y2 = np.where(y2 >= py2, py2 - 1, y2)
 
-    flag = 0
-    doc = fitz.open(pdf_path)
-    for idx, page in enumerate(doc):
-
-        if (float(flag) / doc.pageCount) >= 0.5:
-            return False
-
-        page_text = page.getText("")
-        remove_spaces_text = "".join(page_text.split())
-        total_bad_char = sum([check_bad_char(char) for char in remove_spaces_text])
-
-        if len(remove_spaces_text) and float(total_bad_char) / len(remove_spaces_text) > 0.9:
-            flag += 1
-            continue
-
-        if len(doc) > 1 and idx == 0:  # skip first page
-            continue
-
-        if page.rotation != 0:
-            page.setRotation(0)  # fix coordinate inconsistency issue when page.rotation != 0
-
-        page_box = page.rect
-        # get images from text dict
-        blocks = page.getText("dict")['blocks']
-        boxes = [block['bbox'] for block in blocks if block["type"] == 1]
-
-        # get images from image list
-        xref = page.getImageList(full=True)
-        image_boxes = []
-        if len(xref) > max_images:
-            flag += 1
-            continue
-        for img in xref:
-            try:
-                box = page.getImageBbox(img)
-            except ValueError:
-                item = list(img)
-                item[-1] = 0
-                box = page.getImageBbox(item)
-            image_boxes.append(box)
-
-        if len(boxes) > 0:
-            iou_result, err = check_by_iou(boxes, page_box, 0.6)
-            text_boxes = [block['bbox'] for block in blocks if block["type"] == 0]
-            boxes_area = sum([(i[2] - i[0]) * (i[3] - i[1]) for i in boxes])
-            text_area = sum([(i[2] - i[0]) * (i[3] - i[1]) for i in text_boxes])
-            if boxes_area > text_area * 2 or iou_result:
-                flag += 1
-                continue
+    area = (x2 - x1 + 1) * (y2 - y1 + 1)
+    w = np.maximum(0.0, np.minimum(px2, x2) - np.maximum(px1, x1) + 1)
+    h = np.maximum(0.0, np.minimum(py2, y2) - np.maximum(py1, y1) + 1)
+    inter = w * h
+    iou = inter / (px2 * py2 + area - inter)
+    covered = legal & (iou > iou_thresh)
+
+    def per_page(mask, weights=None):
+        return np.bincount(page[mask], weights=None if weights is None else weights[mask], minlength=page_count)
+
+    text, block, listed = (kind == 0), (kind == 1), (kind == 2)
+    block_pages = per_page(block) > 0
+    block_image = (per_page(block, raw_area) > per_page(text, raw_area) * 2) | (per_page(block & covered) > 0)
+    listed_image = per_page(listed & covered) > 0
+    return (block_pages & block_image) | listed_image
+
+
+def inspect_pdf_pages(doc, indices, max_images=1000, page_dicts=None):
+    """return a numpy bool array, True for each page in indices that looks like a scanned image"""
+    flags = np.zeros(len(indices), dtype=bool)
+    rows = []
+    page_boxes = []
+    for position, idx in enumerate(indices):
+        decided, boxes, page_box = collect_pdf_page(doc, idx, doc[idx], max_images, page_dicts)
+        page_boxes.append(tuple(page_box))
+        if decided is not None:
+            flags[position] = decided
+        else:
+            rows += [(position, *box) for box in boxes]
+    if len(rows) > 0:
+        flags |= classify_pages(np.array(rows, dtype=float), np.array(page_boxes, dtype=float))
+    return flags
 
-        if len(image_boxes) > 0:
-            iou_result, err = check_by_iou(image_boxes, page_box, 0.6)
-            if iou_result:
-                flag += 1
-                continue
 
-    return (float(flag) / doc.pageCount) < 0.5
+# 页面按批收集，每批的图片覆盖率用一次 numpy 计算
+PAGE_BATCH = 256
+SAMPLE_BATCH = 8
 
+# 抽样检测的默认参数，由 configure_pdf_detection 设置
+_pdf_sample = None
+_pdf_confidence = 0.95
 
-def title_tokenizer(text, language):
-    if language == "Chinese":
-        # 只保留中文字符
-        if "<p>" in text or "<line>" in text:
-            inner_text = BeautifulSoup(text).getText()
-            result = re.findall(r'[\u4e00-\u9fa5]', str(inner_text))
-        else:
-            result = re.findall(r'[\u4e00-\u9fa5]', str(text))
-    elif language == "English":
-        if "<p>" in text or "<line>" in text:
-            inner_text = BeautifulSoup(text).getText()
-            result = re.findall(r'[a-z]|[A-Z]', str(inner_text))
-        else:
-            result = re.findall(r'[a-z]|[A-Z]', str(text))
-    result = "".join(result)
-    result = result.replace("和", "")
-    result = result.replace("与", "")
-    result = result.replace("或", "")
-    result = result.replace("的", "")
-    return result
+
+def check_pdf_detection(sample, confidence):
+    if sample is not None and sample < 1:
+        raise ValueError("pdf sample should be at least 1 page, got " + str(sample))
+    if not 0 < confidence < 1:
+        raise ValueError("pdf confidence should be in (0, 1), got " + str(confidence))
+
+
+def configure_pdf_detection(sample=None, confidence=0.95):
+    global _pdf_sample, _pdf_confidence
+    check_pdf_detection(sample, confidence)
+    _pdf_sample = sample
+    _pdf_confidence = confidence
+
+
+def stratified_pages(page_count, budget):
+    """
+    To pick budget pages, the middle page of each of budget equal strata, ordered by the bit-reversed
+    stratum number so that every prefix of the order is spread over the whole document
+    """
+    budget = min(budget, page_count)
+    bits = max(budget - 1, 0).bit_length()
+    strata = sorted(range(budget), key=lambda i: int(format(i, "0" + str(bits) + "b")[::-1], 2) if bits else 0)
+    return [(2 * i + 1) * page_count // (2 * budget) for i in strata]
+
+
+def sampling_settled(flag, inspected, confidence, looks):
+    """
+    Hoeffding bound: after inspected pages, flag of them images, the true image page ratio is within
+    flag / inspected ± radius with probability at least confidence, settled once 0.5 is outside that.
+    The check runs after every page, so the error budget 1 - confidence is split over all looks
+    (union bound), otherwise stopping at the first lucky look would overstate the confidence
+    :param looks: int, the most pages sampling can inspect, one check after each
+    """
+    radius = math.sqrt(math.log(2 * looks / (1 - confidence)) / (2 * inspected))
+    return abs(float(flag) / inspected - 0.5) > radius
+
+
+def detect_pdf_type(pdf_path, max_images=1000, page_dicts=None, sample=None, confidence=None):
+    """
+    return True of the pdf is searchable, page_dicts collects the text dicts loaded on the way
+    :param sample: int, inspect at most this many stratified pages, all pages when None
+    :param confidence: float, stop sampling once the image page ratio is on one side of 0.5 at this confidence
+    """
+    if sample is None:
+        sample = _pdf_sample
+    if confidence is None:
+        confidence = _pdf_confidence
+
+    check_pdf_detection(sample, confidence)
+
+    doc = fitz.open(pdf_path)
+    if doc.pageCount == 0:
+        raise ValueError("Sorry, The pdf " + pdf_path + " has no pages.")
+    if sample is None:
+        flag = 0
+        start = 0
+        while start < doc.pageCount:
+            if (float(flag) / doc.pageCount) >= 0.5:
+                return False
+            # 每页最多让 flag 加一，批次不超过离一半还差的页数，就不会比逐页检查多读
+            size = min(PAGE_BATCH, int(math.ceil(doc.pageCount / 2.0)) - flag)
+            indices = range(start, min(start + size, doc.pageCount))
+            flag += inspect_pdf_pages(doc, indices, max_images, page_dicts).sum()
+            start += size
+        return (float(flag) / doc.pageCount) < 0.5
+
+    order = stratified_pages(doc.pageCount, sample)
+    flag = 0
+    inspected = 0
+    read = 0
+    for start in range(0, len(order), SAMPLE_BATCH):
+        batch = order[start:start + SAMPLE_BATCH]
+        flags = inspect_pdf_pages(doc, batch, max_images, page_dicts)
+        read += len(batch)
+        settled = False
+        for image_page in flags:
+            flag += image_page
+            inspected += 1
+            if sampling_settled(flag, inspected, confidence, len(order)):
+                settled = True
+                break
+        if settled:
+            break
+    print("[INFO] detect_pdf_type inspected %d of %d pages" % (read, doc.pageCount))
+    return (float(flag) / inspected) < 0.5
 
 
 def get_same_char_num(config_chapter, current_chapter):
@@ -149,10 +321,11 @@ def get_same_char_num(config_chapter, current_chapter):
     return difflib.SequenceMatcher(None, config_chapter, current_chapter).quick_ratio()
 
 
-def find_min_string(chapters, current_file_list):
+def find_min_string(chapters, current_file_list, language):
     """
     :param chapters: title in config, only true
     :param current_file_list:  title in current file
+    :param language: str, file language
     :return:
     """
     # # 默认cover 保留
@@ -160,8 +333,9 @@ def find_min_string(chapters, current_file_list):
     extract_chapters = []
     for key_string, value in chapters.items():
         if value:
-            key_string_tokenize = title_tokenizer(key_string)
-            same_char_num_s = [get_same_char_num(key_string_tokenize, title_tokenizer(i)) for i in current_file_list]
+            key_string_tokenize = title_tokenizer(key_string, language)
+            same_char_num_s = [get_same_char_num(key_string_tokenize, title_tokenizer(i, language))
+                               for i in current_file_list]
             max_mun = max(same_char_num_s)
             index = same_char_num_s.index(max_mun)
             if max_mun < 0.25:
@@ -173,111 +347,141 @@ def find_min_string(chapters, current_file_list):
     return extract_chapters
 
 
-def get_chapters_html(soup, dic, chapters, combine, out_path):
+def get_chapters_html(index, dic, chapters, combine, out_path):
     current_file_list = dic
-    extract_chapters = find_min_string(chapters, current_file_list)
-    para = [p for p in soup.find_all() if p.name in ['img', 'table', 'p']]
-    for p in para:
-        if p['chapter'] not in extract_chapters or len(p.get_text().strip()) == 0:
+    extract_chapters = find_min_string(chapters, current_file_list, index.language)
+    for i, p in enumerate(index):
+        if p['chapter'] not in extract_chapters or len(index.text(i).strip()) == 0:
             if "style" in p.attrs:
                 p['style'] += ";display:none;"
             else:
                 p['style'] = "display:none;"
 
 
+# office file to html, skipped when the same bytes were converted before
+def convertTohtml(filePath, outhtml, timeout=None):
+    service = get_conversion_service()
+    cache = get_conversion_cache()
+    if cache is None:
+        service.convert(filePath, outhtml, timeout)
+        return
+    key = cache.key(filePath, service.version())
+    if not cache.get(key, outhtml):
+        service.convert(filePath, outhtml, timeout)
+        cache.put(key, outhtml)
+
+
+def intermediate_html_name(filePath):
+    """
+    Name of the converted html of filePath, keeps the extension and a hash of the full path so that
+    a.doc, a.docx and a.docx of another directory converted at the same time never share a file
+    """
+    digest = hashlib.sha1(os.path.abspath(filePath).encode("utf-8")).hexdigest()[:8]
+    return ntpath.basename(filePath) + "." + digest + ".html"
+
+
+# docx to html
+def docxTohtml(filePath, output_dir_parent, timeout=None):
+    output_dir = output_dir_parent + "/docxDir/"
+    # 多进程时几个 worker 可能同时创建同一个目录
+    os.makedirs(output_dir, exist_ok=True)
+    outhtml = os.path.join(output_dir, intermediate_html_name(filePath))
+    convertTohtml(filePath, outhtml, timeout)
+    return outhtml
+
+
 # docx to soup
 def docxTosoup(filePath, output_dir_parent, timeout=None):
-    basename = ntpath.basename(filePath)
-    output_file = basename.replace(".docx", ".html")
-    output_file = output_file.replace(".doc", ".html")
-    output_dir = output_dir_parent + "/docxDir/"
-    if not os.path.exists(output_dir):
-        os.mkdir(output_dir)
-    outhtml = os.path.join(output_dir, output_file)
-    os.system('unoconv -f html -o' + " " + outhtml + " " + filePath)
-    with open(outhtml, 'r') as temp:
-        html = temp.read()
-        temp.close()
-        soup = BeautifulSoup(html, "html.parser")
-    return soup
+    return htmlTosoup(docxTohtml(filePath, output_dir_parent, timeout), "html.parser")
+
+
+# pdf to html
+def pdfTohtml(filePath, output_dir_parent, timeout=None):
+    output_dir = output_dir_parent + "/pdfDir/"
+    os.makedirs(output_dir, exist_ok=True)
+    outhtml = os.path.join(output_dir, intermediate_html_name(filePath))
+    convertTohtml(filePath, outhtml, timeout)
+    return outhtml
 
 
 # pdf to soup
 def pdfTosoup(filePath, output_dir_parent, timeout=None):
-    basename = ntpath.basename(filePath)
-    output_file = basename.replace(".pdf", ".html")
-    output_dir = output_dir_parent + "/pdfDir/"
-    if not os.path.exists(output_dir):
-        os.mkdir(output_dir)
-    outhtml = os.path.join(output_dir, output_file)
-    print(outhtml)
-    os.system('unoconv -f html -o' + " " + outhtml + " " + filePath)
-    with open(outhtml, 'r') as temp:
-        html = temp.read()
-        temp.close()
-        soup = BeautifulSoup(html, "html.parser")
-    return soup
+    return htmlTosoup(pdfTohtml(filePath, output_dir_parent, timeout), "html.parser")
 
 
-# html to soup
-def htmlTosoup(file_path):
+# html to soup, features picks the bs4 tree builder, "lxml" nests malformed html exactly as stream_paragraphs
+def htmlTosoup(file_path, features=None):
     with open(file_path, "r") as temp:
-        soup = BeautifulSoup(temp.read())
+        soup = BeautifulSoup(temp.read(), features)
         temp.close()
     return soup
 
 
-def filesToSoup(filePath, output_dir_parent):
-    if not os.path.exists(output_dir_parent):
-        os.mkdir(output_dir_parent)
+def filesToSoup(filePath, output_dir_parent, features=None):
+    """
+    :param features: str, bs4 tree builder, by default html.parser for converted doc/docx/pdf and bs4's own
+                     choice for html files
+    """
+    if features is None and filePath.split(".")[-1] != "html":
+        features = "html.parser"
+    return htmlTosoup(filesToHtml(filePath, output_dir_parent), features)
+
+
+def filesToHtml(filePath, output_dir_parent):
+    os.makedirs(output_dir_parent, exist_ok=True)
 
     filename = ntpath.basename(filePath)
     type = filename.split(".")[-1]
-    print(type)
     if type == "docx" or type == "doc":
-        soup = docxTosoup(filePath, output_dir_parent)
-        return soup
+        return docxTohtml(filePath, output_dir_parent)
     elif type == "pdf":
         if detect_pdf_type(filePath):
-            soup = pdfTosoup(filePath, output_dir_parent)
+            return pdfTohtml(filePath, output_dir_parent)
         else:
             raise ValueError("Sorry, The template doesn't support imagae PDFs currently.")
-        return soup
     elif type == "html":
-        soup = htmlTosoup(filePath)
-        return soup
+        return filePath
     else:
         raise ValueError("Sorry, The template doesn't support ." + type + " currently.")
 
 
-# tokeinze text, only keep chinese character
-def content_tokenizer(text, language):
-
-    if language == "Chinese":
-        # 只保留中文字符
-        if "<p>" in text or "<line>" in text:
-            inner_text = BeautifulSoup(text).getText()
-            result = re.findall(r'[\u4e00-\u9fa5]', str(inner_text))
-        else:
-            result = re.findall(r'[\u4e00-\u9fa5]', str(text))
-    if language == "English":
-        if "<p>" in text or "<line>" in text:
-            inner_text = BeautifulSoup(text).getText()
-            result = re.findall(r'[a-z]|[A-Z]', str(inner_text))
-        else:
-            result = re.findall(r'[a-z]|[A-Z]', str(text))
-    result = "".join(result)
-    return result
+def filesToIndex(filePath, output_dir_parent, language, parser="bs4", engine="unoconv"):
+    """
+    To read a file into a ParagraphIndex
+    :param parser: str, bs4 builds the whole soup, lxml builds it with the lxml builder, stream keeps only
+                   img/table/p elements while parsing with lxml, so its chapters match lxml on any markup
+    :param engine: str, unoconv converts pdf/docx to html first, native reads text pdf blocks with PyMuPDF
+                   and docx paragraphs from word/document.xml, legacy .doc always goes through unoconv
+    """
+    type = filePath.split(".")[-1]
+    if engine == "native" and type == "pdf":
+        page_dicts = {}
+        if not detect_pdf_type(filePath, page_dicts=page_dicts):
+            raise ValueError("Sorry, The template doesn't support imagae PDFs currently.")
+        return ParagraphIndex.from_pdf(filePath, language, page_dicts)
+    elif engine == "native" and type == "docx" and zipfile.is_zipfile(filePath):
+        return ParagraphIndex.from_docx(filePath, language)
+    elif engine not in ["unoconv", "native"]:
+        raise ValueError("Sorry, The template doesn't support engine " + engine + " currently.")
+
+    if parser == "bs4":
+        return ParagraphIndex.from_soup(filesToSoup(filePath, output_dir_parent), language)
+    elif parser == "lxml":
+        return ParagraphIndex.from_soup(filesToSoup(filePath, output_dir_parent, "lxml"), language)
+    elif parser == "stream":
+        return ParagraphIndex.from_stream(filesToHtml(filePath, output_dir_parent), language)
+    else:
+        raise ValueError("Sorry, The template doesn't support parser " + parser + " currently.")
 
 
-def find_soup_menu(para, language):
+def find_soup_menu(para):
+    language = para.language
     for index in range(len(para)):
-        text = para[index].get_text()
-        text = content_tokenizer(text, language)
+        text = para.tokens(index)
         if language == "Chinese":
             if "目" == text:
                 for j in range(index, min(index + 10, len(para))):
-                    next_text = content_tokenizer(para[j].get_text(), language)
+                    next_text = para.tokens(j)
                     if next_text == "":
                         continue
                     elif next_text == "录":
@@ -295,28 +499,15 @@ def find_soup_menu(para, language):
 
 
 def get_title(text):
-    if "第" in text:
-        text_list = text.split("第")[1:]
-        new_text = [re.sub(".部分|..部分|...部分", "", i) for i in text_list]
-        new_text = [re.sub(".节|..节|...节", "", i) for i in new_text]
-        new_text = [re.sub("\s+", "", i) for i in new_text]
-        new_text = [re.sub("十|一|二|三|四|五|六|七|八|九", "", i) for i in new_text]
-        return new_text
-    else:
-        tmp = "".join(re.sub(".部分|..部分|...部分", "", text))
-        tmp = "".join(re.sub(".节|..节|...节", "", tmp))
-        tmp = "".join(re.sub("\s+", "", tmp))
-        tmp = "".join(re.sub("十|一|二|三|四|五|六|七|八|九", "", tmp))
-        return [tmp]
+    return [key for key, _ in split_titles(text)]
 
 
-def get_soup_dictionary(soup, chapter_num, language):
+def get_soup_dictionary(para, chapter_num):
     file_dictionary = []
     num = 0
-    para = [p for p in soup.find_all() if p.name in ['img', 'table', 'p']]
-    x = find_soup_menu(para, language)
+    x = find_soup_menu(para)
     for k in range(x + 1, len(para)):
-        text = content_tokenizer(para[k].get_text(), language)
+        text = para.tokens(k)
         para[k]['chapter'] = 'cover'
         if text != "" and "\x0c" not in text:
             new_text = get_title(text)
@@ -331,42 +522,6 @@ def get_soup_dictionary(soup, chapter_num, language):
     return file_dictionary, k + 1
 
 
-def match_dic_soup(file_dictionary, p, language):
-    match = None
-    a = WeightedLevenshtein(character_substitution=CharSub())
-    original_sentence = p.get_text()
-    sentence = content_tokenizer(original_sentence, language)
-    new_text = "".join(get_title(sentence))
-
-    for i in range(0, len(file_dictionary)):
-        # pattern_1 = dictionary[i]+file_dictionary[i]
-        length = - int(len(file_dictionary[i]))
-
-        title = file_dictionary[i]
-
-        tmp = "".join(re.sub(".部分|..部分|...部分", "", file_dictionary[i]))
-        tmp = "".join(re.sub("第", "", tmp))
-        tmp = "".join(re.sub(".节|..节|...节", "", tmp))
-        tmp = "".join(re.sub("\s+", "", tmp))
-        tmp = "".join(re.sub("十|一|二|三|四|五|六|七|八|九", "", tmp))
-
-        if tmp == sentence[length:] and "本" + tmp != sentence[length - 1:] and "的" + tmp != sentence[length - 1:]:
-            last_char = original_sentence.strip()[-1]
-            if not last_char in [";", "；", "。", "\"", "”"]:
-                match = title
-                file_dictionary.remove(title)
-                break
-        elif abs(len(new_text) - len(tmp)) >= 3:
-            continue
-        elif a.distance(sentence, tmp) <= 1 or a.distance(new_text, tmp) <= 1:
-            match = title
-            file_dictionary.remove(title)
-            break
-        else:
-            continue
-    return match, file_dictionary
-
-
 # 删掉相同的内容（将页眉误认为目录之一）
 def delete_duplicate(dic, li):
     new_dic = []
@@ -378,13 +533,13 @@ def delete_duplicate(dic, li):
     return new_dic, new_li
 
 
-def match_soup(para_id, file_dictionary, soup, language):
+def match_soup(para_id, file_dictionary, para):
     dic = []
     li = []
-    para = [p for p in soup.find_all() if p.name in ['img', 'table', 'p']]
+    matcher = TocMatcher(file_dictionary)
     for i in range(para_id, len(para)):
-        if len(file_dictionary) > 0:
-            result, file_dictionary = match_dic_soup(file_dictionary, para[i], language)
+        if len(matcher) > 0:
+            result = matcher.match(para.text(i), para.tokens(i))
             if result != None:
                 dic.append(result)
                 li.append(i)
@@ -394,8 +549,7 @@ def match_soup(para_id, file_dictionary, soup, language):
     return dic, li
 
 
-def get_part_soup(soup, dic, li):
-    para = [p for p in soup.find_all() if p.name in ['img', 'table', 'p']]
+def get_part_soup(para, dic, li):
     for index in range(li[0]):
         para[index]['chapter'] = "cover"
 
@@ -407,3 +561,34 @@ def get_part_soup(soup, dic, li):
 
     for index in range(li[-1], len(para)):
         para[index]['chapter'] = dic[-1]
+
+
+def strip_style(p):
+    for line in p.find_all():
+        if line.name == 'line':
+            del line['style']
+    del p['style']
+
+
+def write_chapters(para, dic, out_path, filename):
+    """
+    To write every chapter in dic into its own html, the elements of each chapter are collected in one
+    pass over para. Chapters are still stripped and written one after another in dic order, so nested
+    elements get exactly the styles the per-chapter loop over the whole document gave them
+    :param para: ParagraphIndex, elements with chapter attributes
+    :param dic: list, chapter titles to write
+    :param out_path: str, file output path
+    :param filename: str, original file name, used as the output prefix
+    :return:
+    """
+    targets = dict((chapter, []) for chapter in dic)
+    for p in para:
+        if p.name in ['table', 'p'] and p['chapter'] in targets:
+            targets[p['chapter']].append(p)
+    for chapter in dic:
+        target = targets[chapter]
+        for p in target:
+            strip_style(p)
+        with open(os.path.join(out_path, (filename + "_" + chapter + ".html")), "w") as temp:
+            temp.write(''.join([str(p) for p in target]))
+            temp.close()
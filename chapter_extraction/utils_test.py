@@ -0,0 +1,238 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from bs4 import BeautifulSoup
+
+from . import utils
+from .utils import ParagraphIndex, check_by_iou, check_pdf_detection, classify_pages, find_min_string, get_chapters_html, \
+    get_part_soup, sampling_settled, stratified_pages, write_chapters
+
+
+def reference_page(text_boxes, block_boxes, image_boxes, page_box):
+    """the per page rules classify_pages replaced, built on check_by_iou"""
+    if len(block_boxes) > 0:
+        iou_result, err = check_by_iou(block_boxes, page_box, 0.6)
+        boxes_area = sum([(i[2] - i[0]) * (i[3] - i[1]) for i in block_boxes])
+        text_area = sum([(i[2] - i[0]) * (i[3] - i[1]) for i in text_boxes])
+        if boxes_area > text_area * 2 or iou_result:
+            return True
+    if len(image_boxes) > 0:
+        iou_result, err = check_by_iou(image_boxes, page_box, 0.6)
+        if iou_result:
+            return True
+    return False
+
+
+CHAPTERS_HTML = """<html><body>
+<p>封面</p>
+<p style="a">第一节 总则<line style="x">第一行</line><line>第二行</line></p>
+<table style="t"><tr><td><p style="in">表格内容<line style="y">行</line></p></td></tr></table>
+<p style="b">图片<img src="a.png" style="i"/></p>
+<img src="b.png"/>
+<p style="c">第二节 释义</p>
+<table style="t2"><tr><td><p style="d">释义表格</p><p style="e">第三节 估值</p></td></tr></table>
+<p style="f">估值内容</p>
+</body></html>"""
+
+
+def reference_chapters(soup, dic, out_path, filename):
+    """the per chapter loop write_chapters replaced"""
+    for chapter in dic:
+        para = [p for p in soup.find_all() if p.name in ['table', 'p']]
+        out_file = os.path.join(out_path, (filename + "_" + chapter + ".html"))
+        with open(out_file, "w") as temp:
+            target = [p for p in para if p["chapter"] == chapter]
+            for p in target:
+                lines = [line for line in p.find_all() if line.name in ['line']]
+                for line in lines:
+                    del line['style']
+
+                del p['style']
+            target = [str(p) for p in target]
+            temp.write(''.join(target))
+            temp.close()
+
+
+def random_box(rng, width, height):
+    if rng.random() < 0.2:
+        # 几乎铺满整页的图片
+        return [rng.uniform(-5, 10), rng.uniform(-5, 10), width - rng.uniform(-5, 10), height - rng.uniform(-5, 10)]
+    x0 = rng.uniform(-20, width + 20)
+    y0 = rng.uniform(-20, height + 20)
+    # 偶尔给出非法坐标 (x1 <= x0)
+    return [x0, y0, x0 + rng.uniform(-10, width), y0 + rng.uniform(-10, height)]
+
+
+class TestPdfDetection(unittest.TestCase):
+
+    def test_stratified_pages(self):
+        self.assertEqual(stratified_pages(100, 1), [50])
+        self.assertEqual(stratified_pages(100, 4), [12, 62, 37, 87])
+        # 预算超过页数时每页都取，且不重复
+        self.assertEqual(sorted(stratified_pages(5, 10)), [0, 1, 2, 3, 4])
+        for page_count in [1, 2, 7, 100, 1001]:
+            for budget in [1, 3, 8, 33]:
+                order = stratified_pages(page_count, budget)
+                self.assertEqual(len(order), min(page_count, budget))
+                self.assertEqual(len(set(order)), len(order))
+                self.assertTrue(all(0 <= i < page_count for i in order))
+                # 任意前缀都覆盖了文档的前后两半
+                if len(order) >= 2:
+                    self.assertLess(order[0], page_count / 2)
+                    self.assertGreaterEqual(order[1], page_count / 2)
+
+    def test_sampling_settled(self):
+        # 只看一次时，0.95 置信度下全是图片页第 8 页才能下结论
+        self.assertFalse(sampling_settled(7, 7, 0.95, 1))
+        self.assertTrue(sampling_settled(8, 8, 0.95, 1))
+        self.assertTrue(sampling_settled(0, 8, 0.95, 1))
+        # 每页都检查，20 次检查分摊错误概率后要到第 14 页
+        self.assertFalse(sampling_settled(13, 13, 0.95, 20))
+        self.assertTrue(sampling_settled(14, 14, 0.95, 20))
+        # 一半一半永远不能提前结束
+        self.assertFalse(sampling_settled(500, 1000, 0.95, 1000))
+        # 置信度越高需要的页数越多
+        self.assertFalse(sampling_settled(16, 16, 0.99, 20))
+        self.assertTrue(sampling_settled(17, 17, 0.99, 20))
+
+    def test_sampling_error_rate(self):
+        # 真实图片页比例 0.4，每页检查一次、一结束就下结论，判错的比例不能超过 1 - confidence
+        rng = np.random.RandomState(0)
+        sample, runs, wrong = 60, 2000, 0
+        pages = rng.random_sample((runs, sample)) < 0.4
+        for run in range(runs):
+            flag = 0
+            for inspected in range(1, sample + 1):
+                flag += pages[run, inspected - 1]
+                if sampling_settled(flag, inspected, 0.9, sample):
+                    wrong += flag * 2 > inspected
+                    break
+        self.assertLessEqual(wrong, runs * 0.1)
+
+    def test_check_pdf_detection(self):
+        check_pdf_detection(None, 0.95)
+        check_pdf_detection(1, 0.5)
+        for sample, confidence in [(0, 0.95), (-1, 0.95), (10, 1.0), (10, 0.0), (None, 1.5)]:
+            with self.assertRaises(ValueError):
+                check_pdf_detection(sample, confidence)
+
+    def test_classify_pages_matches_check_by_iou(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            page_boxes, rows, expected = [], [], []
+            for pos in range(rng.randint(1, 12)):
+                width, height = rng.choice([(595, 842), (612, 792), (300, 400)])
+                page_box = [0, 0, width, height]
+                kinds = ([], [], [])
+                for _ in range(rng.randint(0, 6)):
+                    kind = rng.randint(0, 2)
+                    box = random_box(rng, width, height)
+                    kinds[kind].append(box)
+                    rows.append([pos, kind] + box)
+                page_boxes.append(page_box)
+                expected.append(reference_page(kinds[0], kinds[1], kinds[2], page_box))
+            boxes = np.array(rows, dtype=float).reshape(-1, 6)
+            result = classify_pages(boxes, np.array(page_boxes, dtype=float))
+            self.assertEqual(result.tolist(), expected)
+
+    def check_full_scan(self, page_count, image_pages):
+        read = []
+
+        def inspect(doc, indices, max_images=1000, page_dicts=None):
+            read.extend(indices)
+            return np.array([i in image_pages for i in indices], dtype=bool)
+
+        with mock.patch.object(utils.fitz, "open", return_value=mock.Mock(pageCount=page_count)), \
+                mock.patch.object(utils, "inspect_pdf_pages", side_effect=inspect):
+            result = utils.detect_pdf_type("a.pdf", sample=None)
+        self.assertEqual(read, list(range(len(read))))
+        return result, len(read)
+
+    def test_full_scan_stops_at_half(self):
+        # 和逐页检查一样，一半页面是图片时立刻停止
+        self.assertEqual(self.check_full_scan(300, set(range(300))), (False, 150))
+        self.assertEqual(self.check_full_scan(301, set(range(301))), (False, 151))
+        self.assertEqual(self.check_full_scan(1000, set(range(0, 1000, 2))), (False, 999))
+        self.assertEqual(self.check_full_scan(300, set()), (True, 300))
+        self.assertEqual(self.check_full_scan(300, set(range(149))), (True, 300))
+        self.assertEqual(self.check_full_scan(1, {0}), (False, 1))
+
+
+class TestParagraphIndex(unittest.TestCase):
+
+    def test_from_soup(self):
+        soup = BeautifulSoup(CHAPTERS_HTML, "html.parser")
+        para = ParagraphIndex.from_soup(soup, "Chinese")
+        self.assertEqual([p.name for p in para], ["p", "p", "table", "p", "p", "img", "img", "p", "table", "p", "p",
+                                                  "p"])
+        self.assertEqual(len(para), 12)
+        self.assertIs(para.document, soup)
+        self.assertEqual(para.text(1), "第一节 总则第一行第二行")
+        self.assertEqual(para.tokens(1), "第一节总则第一行第二行")
+        self.assertEqual(para.tokens(5), "")
+        # 文本只取一次，之后改动元素不影响缓存
+        para[1].string = "改了"
+        self.assertEqual(para.tokens(1), "第一节总则第一行第二行")
+
+    def test_get_chapters_html(self):
+        dic, li = ["总则", "释义", "估值"], [1, 7, 10]
+        self.assertEqual(find_min_string({"总则": True, "释义": False, "估值": True}, dic, "Chinese"), ["总则", "估值"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(find_min_string({"风险揭示": True}, dic, "Chinese"), (None, None))
+
+        para = ParagraphIndex.from_soup(BeautifulSoup(CHAPTERS_HTML, "html.parser"), "Chinese")
+        get_part_soup(para, dic, li)
+        get_chapters_html(para, dic, {"总则": True, "释义": False}, True, None)
+        hidden = [i for i, p in enumerate(para) if "display:none;" in p.get("style", "")]
+        # 非目标章节和没有文字的元素（图片）都隐藏，原有样式保留在前面
+        self.assertEqual(hidden, [0, 5, 6, 7, 8, 9, 10, 11])
+        self.assertEqual(para[7]["style"], "c;display:none;")
+
+
+class TestWriteChapters(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_both(self, dic, li, written):
+        outputs = []
+        for reference in [True, False]:
+            para = ParagraphIndex.from_soup(BeautifulSoup(CHAPTERS_HTML, "html.parser"), "Chinese")
+            get_part_soup(para, dic, li)
+            out_path = tempfile.mkdtemp(dir=self.dir.name)
+            if reference:
+                reference_chapters(para.document, written, out_path, "a.html")
+            else:
+                write_chapters(para, written, out_path, "a.html")
+            files = {}
+            for file in sorted(os.listdir(out_path)):
+                with open(os.path.join(out_path, file)) as temp:
+                    files[file] = temp.read()
+            outputs.append(files)
+        self.assertEqual(outputs[0], outputs[1])
+        return outputs[1]
+
+    def test_same_as_per_chapter_loop(self):
+        # 第三节从表格里的段落开始，外层表格属于第二节
+        dic, li = ["总则", "释义", "估值"], [1, 7, 10]
+        files = self.write_both(dic, li, dic + ["空章节"])
+        self.assertEqual(files["a.html_空章节.html"], "")
+        self.assertNotIn("style", files["a.html_总则.html"].replace('style="i"', ""))
+        self.assertIn('src="a.png" style="i"/>', files["a.html_总则.html"])
+        # 写第二节时第三节还没处理，嵌在里面的段落保留样式
+        self.assertIn('style="e">第三节 估值</p>', files["a.html_释义.html"])
+        self.write_both(dic, li, ["估值", "释义"])
+        self.write_both(dic, li, ["释义", "总则", "释义"])
+
+
+if __name__ == "__main__":
+    unittest.main()